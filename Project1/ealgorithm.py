@@ -1,18 +1,37 @@
 
-import random
+import random, asyncio, csv, json, os
+from bisect import bisect_left
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from pprint import pprint as pp
-from copy import deepcopy
 from collections import OrderedDict as od
 
+#NumPy is only needed for the array engine, the list engine runs without it
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
 #Stores a dictionary of runs labeled by run number
 #Will print data from all runs at once
 class RunCollection:
     #Initialize with the number of runs, issuing a warning if the number is exceeded
     #Sets up a dictionary to store individual run data
-    def __init__(self, maxRuns):
+    #useNumpy picks the array engine and useSus picks stochastic universal sampling
+    #for every run generated by the collection
+    #evaluator gets the fitness values of every run, see Evaluator
+    #resultsPath streams each generation's results to a file, see generateRuns
+    def __init__(self, maxRuns, useNumpy = False, useSus = False, evaluator = None, resultsPath = None):
         self.maxRuns = maxRuns
         self.currentRun = 0
         self.allRunData = od()
+        self.useNumpy = useNumpy
+        self.useSus = useSus
+        self.evaluator = evaluator
+        self.resultsPath = resultsPath
+        #Per generation sums of average and best fitness from runs whose
+        #generation results were streamed, see addRun
+        self.streamedAvgSums = od()
+        self.streamedBestSums = od()
 
     #Adds an empty run to the dictionary if there is room and returns it
     #Issues a warning if another would exceed the maximum number
@@ -27,6 +46,23 @@ class RunCollection:
             print("Warning: more runs than expected, user wanted max of %d runs." % self.numRuns)
             return None
 
+    #Adds a finished run to the dictionary if there is room, as addAndUseRun does
+    #A streamed run's fitness values are added to the collection's sums and
+    #dropped from the run, so memory only grows with the number of generations
+    def addRun(self, storeRun):
+        if self.currentRun < self.maxRuns:
+            if storeRun.streamedFitness is not None:
+                for genKey, (avgFit, bestFit) in storeRun.streamedFitness.items():
+                    self.streamedAvgSums[genKey] = self.streamedAvgSums.get(genKey, 0) + avgFit
+                    self.streamedBestSums[genKey] = self.streamedBestSums.get(genKey, 0) + bestFit
+                storeRun.streamedFitness = None
+            self.currentRun += 1
+            self.allRunData['Run ' + str(self.currentRun)] = storeRun
+            return storeRun
+        else:
+            print("Warning: more runs than expected, user wanted max of %d runs." % self.maxRuns)
+            return None
+
     #Allows access to any run added before the current run in case it is needed
     def getRunNum(self, num):
         if num > 0 and num <= self.currentRun:
@@ -35,6 +71,36 @@ class RunCollection:
             print("Warning: run number %d does not exist." % num)
             return None
 
+    #Seeds and runs every remaining run, one seed per run
+    #With more than one worker the runs are spread over a process pool. Each
+    #run is seeded inside its worker and results are added back in run order,
+    #so the output matches running them one after another.
+    #With resultsPath set, generation results are streamed to it instead of
+    #kept in memory. Runs in this process share the file one after another.
+    #Runs in workers each get their own file, with the run number put in
+    #place of {} in the path, or before the extension if there is no {}.
+    #popSize and chromoSize set the size of every run, see singleRun
+    def generateRuns(self, seeds, numGens = 50, isMaxFitness = True, numWorkers = 1,
+                     popSize = None, chromoSize = 3):
+        jobs = []
+        for i in range(self.currentRun, self.maxRuns):
+            path = self.resultsPath
+            append = False
+            if path is not None:
+                if numWorkers > 1 or '{}' in path:
+                    path = _runResultsPath(path, i + 1)
+                else:
+                    append = i > self.currentRun
+            jobs.append((seeds[i], numGens, isMaxFitness, self.useNumpy, self.useSus, self.evaluator,
+                         path, append, popSize, chromoSize))
+        if numWorkers > 1:
+            with ProcessPoolExecutor(max_workers = numWorkers) as pool:
+                for storeRun in pool.map(_pooledRunWorker, jobs):
+                    self.addRun(storeRun)
+        else:
+            for job in jobs:
+                self.addRun(_runWorker(job))
+
     #Gets the maximum number of runs allowed
     def getMaxRuns(self):
         return self.maxRuns
@@ -44,30 +110,25 @@ class RunCollection:
         return self.currentRun
 
     #Calculate averages for data across all runs
+    #Streamed runs count through the sums kept by addRun
     def prepareAverages(self):
         self.averageRunData = {}
-        avgOfAvgGen = {}
-        avgOfBestGen = {}
+        avgOfAvgGen = dict(self.streamedAvgSums)
+        avgOfBestGen = dict(self.streamedBestSums)
         bestRuns = []
 
-        #Initializes values for all generations stored in runs
-        #Required so we may increment them in one loop
-        for i in self.allRunData['Run 1'].getGenResults():
-            avgOfAvgGen[i] = 0
-            avgOfBestGen[i] = 0
-
         #Increments values for all generations from each run, stored in a dictionary
         #and labeled by generation number, for averages across generations
         for key, run in self.allRunData.items():
             tempData = run.getGenResults()
             for genKey, value in tempData.items():
-                avgOfAvgGen[genKey] += value['Average Fitness']
+                avgOfAvgGen[genKey] = avgOfAvgGen.get(genKey, 0) + value['Average Fitness']
                 #Checks if we wanted to minimize or maximize fitness before incrementing
                 #with the correct value
                 if run.getIsMaxFitness():
-                    avgOfBestGen[genKey] += value['High Fitness']
+                    avgOfBestGen[genKey] = avgOfBestGen.get(genKey, 0) + value['High Fitness']
                 else:
-                    avgOfBestGen[genKey] += value['Low Fitness']
+                    avgOfBestGen[genKey] = avgOfBestGen.get(genKey, 0) + value['Low Fitness']
 
             #Stores all the best of run fitness values. Keeps them all to calculate
             #standard deviation in addition to the average. Not a dictionary because
@@ -134,13 +195,22 @@ class RunCollection:
 #Stores data from a single EA run
 #Initializes with the number of generations to run, stores the random seed,
 #and if we want to min or max the fitness values
+#With a ResultsWriter as sink, generation results are written to it as they
+#come in rather than stored. Only each generation's average and best fitness
+#are kept, in streamedFitness, until a RunCollection adds them to its sums.
 class SingleRunResults:
-    def __init__(self, numGens, randomSeed, isMaxFitness = True):
+    def __init__(self, numGens, randomSeed, isMaxFitness = True, sink = None):
         self.numGens = numGens
         self.randomSeed = randomSeed
         self.isMaxFitness = isMaxFitness
         self.bestOfRun = {'Best Fitness' : None}
         self.genResults = od()
+        self.sink = sink
+        self.resultsPath = None
+        self.streamedFitness = None
+        if sink is not None:
+            self.resultsPath = sink.path
+            self.streamedFitness = od()
 
     #Returns the dictionary of all data from the run
     def getGenResults(self):
@@ -152,7 +222,20 @@ class SingleRunResults:
         tempDict = {'High Fitness' : highFit, 'High Fitness Vector' : hfVector,
                     'Low Fitness' : lowFit, 'Low Fitness Vector' : lfVector,
                     'Average Fitness' : avgFit}
-        self.genResults['Generation ' + str(currentGen)] = tempDict
+        if self.sink is not None:
+            record = {'Random Seed' : self.randomSeed, 'Generation' : currentGen}
+            record.update(tempDict)
+            self.sink.write(record)
+            bestFit = highFit if self.isMaxFitness else lowFit
+            self.streamedFitness['Generation ' + str(currentGen)] = (avgFit, bestFit)
+        else:
+            self.genResults['Generation ' + str(currentGen)] = tempDict
+
+    #Closes the sink, if any, once the run is done
+    def closeResults(self):
+        if self.sink is not None:
+            self.sink.close()
+            self.sink = None
 
     #Returns the fitness value and vector of the current best of run, if any exist
     def getBestOfRun(self):
@@ -178,7 +261,10 @@ class SingleRunResults:
     def print(self):
         print("Random Seed: {}".format(self.randomSeed))
         pp(self.bestOfRun)
-        pp(self.genResults)
+        if self.resultsPath is not None:
+            print("Generation results streamed to {}".format(self.resultsPath))
+        else:
+            pp(self.genResults)
 
     #Specialized for printing this particular project format to a csv, needs adjusting
     #for general use
@@ -188,6 +274,10 @@ class SingleRunResults:
                                                                     self.bestOfRun['Best Vector'][0]) +
               chr(10) + "{0:.6f}".format(self.bestOfRun['Best Vector'][1]) +
               chr(10) + "{0:.6f}\"".format(self.bestOfRun['Best Vector'][2]))
+        if self.resultsPath is not None:
+            print("Generation results streamed to,{}".format(self.resultsPath))
+            print()
+            return
         print("Generation,\"Average" + chr(10) + "Fitness\",\"Worst" + chr(10) + "Fitness\",\"Worst" +
               chr(10) + "Fitness" + chr(10) + "Vector\",\"Best" + chr(10) + "Fitness\",\"Best" +
               chr(10) + "Fitness" + chr(10) + "Vector\"")
@@ -208,8 +298,124 @@ def _fitness(listVal):
         sumVals += x * x
     return sumVals
 
+#Streams generation results to a file as they are produced
+#Records are written as JSON lines, or as CSV rows after a header row if the
+#path ends in .csv, where vectors are one field of space separated values.
+#The file is flushed every flushEvery records so it can be followed while a
+#run is going. With append, records go after those already in the file.
+class ResultsWriter:
+    def __init__(self, path, append = False, flushEvery = 100):
+        self.path = path
+        self.flushEvery = flushEvery
+        self.pending = 0
+        self.file = open(path, 'a' if append else 'w', newline = '')
+        self.csvWriter = None
+        if path.lower().endswith('.csv'):
+            self.csvWriter = csv.writer(self.file)
+            self.needHeader = self.file.tell() == 0
+
+    #Writes one record, a dictionary with the same keys every time
+    def write(self, record):
+        if self.csvWriter is not None:
+            if self.needHeader:
+                self.csvWriter.writerow(record.keys())
+                self.needHeader = False
+            self.csvWriter.writerow([' '.join(str(x) for x in val) if isinstance(val, list) else val
+                                     for val in record.values()])
+        else:
+            self.file.write(json.dumps(record) + '\n')
+        self.pending += 1
+        if self.pending >= self.flushEvery:
+            self.flush()
+
+    #Pushes buffered records out to the file
+    def flush(self):
+        self.file.flush()
+        self.pending = 0
+
+    #Flushes and closes the file
+    def close(self):
+        self.file.close()
+
+#Path for the results of one run, see RunCollection.generateRuns
+def _runResultsPath(path, runNumber):
+    if '{}' in path:
+        return path.format(runNumber)
+    root, ext = os.path.splitext(path)
+    return root + '.run' + str(runNumber) + ext
+
+#Evaluates the fitness of whole generations with a pluggable objective
+#objective takes one chromosome and returns its fitness, _fitness by default.
+#backend picks how a generation is evaluated:
+#  'serial'  one chromosome after another in this process
+#  'thread'  a thread pool of numWorkers threads
+#  'process' a process pool of numWorkers processes, objective must be a
+#            module level function so it can be sent to them
+#  'async'   asyncio, at most concurrency at once. objective may be an async
+#            function, otherwise each call runs in a thread
+#Every backend returns the values in the order of the generation, so results
+#match serial evaluation. Pools, and the event loop for 'async', are made on
+#first use and kept until close.
+class Evaluator:
+    def __init__(self, objective = None, backend = 'serial', numWorkers = None, concurrency = 8):
+        if backend not in ('serial', 'thread', 'process', 'async'):
+            raise ValueError("unknown evaluation backend '%s'" % backend)
+        if objective is None:
+            objective = _fitness
+        self.objective = objective
+        self.backend = backend
+        self.numWorkers = numWorkers
+        self.concurrency = concurrency
+        self.pool = None
+        self.loop = None
+
+    #Returns a list of fitness values, one per chromosome, in order
+    def evaluate(self, listVal):
+        if self.backend == 'serial' or len(listVal) < 2:
+            return [self.objective(i) for i in listVal]
+        if self.backend == 'async':
+            if self.loop is None:
+                self.loop = asyncio.new_event_loop()
+            return self.loop.run_until_complete(self._gather(listVal))
+        if self.pool is None:
+            if self.backend == 'thread':
+                self.pool = ThreadPoolExecutor(max_workers = self.numWorkers)
+            else:
+                self.pool = ProcessPoolExecutor(max_workers = self.numWorkers)
+        return list(self.pool.map(self.objective, listVal))
+
+    #Submits every chromosome at once, limited by a semaphore
+    async def _gather(self, listVal):
+        limit = asyncio.Semaphore(self.concurrency)
+        async def evaluateOne(chromo):
+            async with limit:
+                if asyncio.iscoroutinefunction(self.objective):
+                    return await self.objective(chromo)
+                return await asyncio.to_thread(self.objective, chromo)
+        return await asyncio.gather(*(evaluateOne(i) for i in listVal))
+
+    #Shuts down the pool and closes the event loop, if they were made
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+        if self.loop is not None:
+            self.loop.run_until_complete(self.loop.shutdown_default_executor())
+            self.loop.close()
+            self.loop = None
+
+    #Pools and loops cannot be pickled, so runs in worker processes make their own
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['pool'] = None
+        state['loop'] = None
+        return state
+
 #Obtain a list of fitness values for a generation
-def _getFitnessValues(listVal):
+#Uses the evaluator if one is given
+def _getFitnessValues(listVal, evaluator = None):
+    if evaluator is not None:
+        return evaluator.evaluate(listVal)
     fitList = []
     for i in listVal:
         fitList.append(_fitness(i))
@@ -259,8 +465,8 @@ def _percentFitness(fitList):
 
 #Obtain fitness data about a generation
 #Returns a dictionary including indices of the best and worst chromosomes
-def _getFitnessData(listVal):
-    fitList = _getFitnessValues(listVal)
+def _getFitnessData(listVal, evaluator = None):
+    fitList = _getFitnessValues(listVal, evaluator)
     fitData = {}
     for index, i in enumerate(fitList):
         #Initialize fitData to first fitness value
@@ -296,32 +502,60 @@ def _initialGen(popSize, chromoSize, minVal, maxVal):
         initGen.append(xVals)
     return initGen
 
+#Roulette wheel picks from a list of stacking percentages
+#Binary search finds the first percent range our random choice is in, the same
+#index a scan from the start would stop on, in O(log n) per pick
+def _rouletteIndices(cumulFit, count):
+    return [bisect_left(cumulFit, random.random()) for i in range(count)]
+
+#Stochastic universal sampling from a list of stacking percentages
+#A single random number places count evenly spaced pointers, which are walked
+#through the percent ranges in one pass. The picks come out in index order,
+#so they are shuffled to keep crossover from pairing copies of one chromosome.
+def _susIndices(cumulFit, count):
+    start = random.random() / count
+    picks = []
+    copyIndex = 0
+    for i in range(count):
+        pointer = start + i / count
+        while pointer > cumulFit[copyIndex]:
+            copyIndex += 1
+        picks.append(copyIndex)
+    random.shuffle(picks)
+    return picks
+
+#Fills the generation in place from a list of parent indices
+#The first pick of a chromosome keeps its list and only repeated picks are
+#copied, since crossover and mutation change the lists in place. Genes are
+#floats, so a shallow copy is enough and nothing is deep copied.
+def _applySelection(prevGen, picks):
+    used = [False] * len(prevGen)
+    tempList = []
+    for copyIndex in picks:
+        if used[copyIndex]:
+            tempList.append(prevGen[copyIndex][:])
+        else:
+            used[copyIndex] = True
+            tempList.append(prevGen[copyIndex])
+    #Reuses the storage of the generation list
+    prevGen[:] = tempList
+
 #Selection process, proportional, for a new generation
-def _selectNewGen(prevGen, isMaxFit = True):
-    indices = range(len(prevGen))
+#useSus draws the whole selection with stochastic universal sampling
+def _selectNewGen(prevGen, isMaxFit = True, useSus = False, evaluator = None):
     #Get a list of all fitness values and convert to percents
     #Reverse fitness values if attempting to minimize fitness
-    fitnessVals = _getFitnessValues(prevGen)
+    fitnessVals = _getFitnessValues(prevGen, evaluator)
     if not isMaxFit:
         _minModFitness(fitnessVals)
     _percentFitness(fitnessVals)
-            
-    #Create a new list using percentages in selection
-    tempList = []
-    for i in indices:
-        copyIndex = 0
-        randomChoice = random.random()
-        #randomChoice will never be > 1, so this loop will always end before
-        #out of range errors
-        #Ends when we reach the percent range our randomChoice is in
-        while randomChoice > fitnessVals[copyIndex]:
-            copyIndex += 1
-        #Avoids copying references, prevents manipulating multiple lines at once
-        tempList.append(deepcopy(prevGen[copyIndex]))
 
-    #Set our new selection list to the input
-    for i in indices:
-        prevGen[i] = tempList[i]
+    #Create a new list using percentages in selection
+    if useSus:
+        picks = _susIndices(fitnessVals, len(prevGen))
+    else:
+        picks = _rouletteIndices(fitnessVals, len(prevGen))
+    _applySelection(prevGen, picks)
 
 #Crossover process for a new generation
 def _crossNewGen(prevGenSelect, pointCross, prob):
@@ -387,34 +621,189 @@ def _mutateNewGen(prevGenCross, prob, alpha, minVal = -1.0, maxVal = 5.0):
 #Process a new generation using the previous one
 #Cycles through selection, crossover, and mutation
 #Manipulates list directly so no returns are needed
-def _generateNewGen(prevGen, isMaxFitness = True, pointCross = 1, probC = .8, probM = .1, alpha = .01):
-    _selectNewGen(prevGen, isMaxFitness)
+def _generateNewGen(prevGen, isMaxFitness = True, pointCross = 1, probC = .8, probM = .1, alpha = .01,
+                    useSus = False, evaluator = None):
+    _selectNewGen(prevGen, isMaxFitness, useSus, evaluator)
     _crossNewGen(prevGen, pointCross, probC)
     _mutateNewGen(prevGen, probM, alpha)
 
+#NumPy engine
+#Holds a generation as a 2-D array of shape (popSize, chromoSize) and runs
+#each step as batched array operations instead of one gene at a time.
+#Random values come from a generator seeded with the run's seed, so runs
+#are repeatable but do not match the list engine draw for draw.
+
+#Creates the initial generation as an array
+def _npInitialGen(rng, popSize, chromoSize, minVal, maxVal):
+    return rng.uniform(minVal, maxVal, (popSize, chromoSize))
+
+#Obtain an array of fitness values for a generation
+#The default objective is worked out on the whole array, any other goes
+#through the evaluator one row at a time
+def _npGetFitnessValues(cell, evaluator = None):
+    if evaluator is None or evaluator.objective is _fitness:
+        return (cell * cell).sum(axis = 1)
+    return np.array(evaluator.evaluate(cell.tolist()), dtype = np.float64)
+
+#Obtain fitness data about a generation in the same format as _getFitnessData
+#argmax and argmin keep the first index on ties, as the list version does
+def _npGetFitnessData(cell, evaluator = None):
+    fitList = _npGetFitnessValues(cell, evaluator)
+    high = int(fitList.argmax())
+    low = int(fitList.argmin())
+    return {'High Fit' : float(fitList[high]), 'High Fit Index' : high,
+            'Low Fit' : float(fitList[low]), 'Low Fit Index' : low,
+            'Average Fit' : float(fitList.mean())}
+
+#Selection process, proportional, for a new generation
+#Returns an array of parent indices
+#useSus spaces every pick evenly from one random number, then shuffles them
+def _npSelectNewGen(cell, rng, isMaxFit = True, useSus = False, evaluator = None):
+    fitList = _npGetFitnessValues(cell, evaluator)
+    #Reverse fitness values if attempting to minimize fitness
+    if not isMaxFit:
+        fitList = fitList.min() + fitList.max() - fitList
+    #Stacking percentages, with the final value raised as in _percentFitness
+    cumulFit = np.cumsum(fitList / fitList.sum())
+    cumulFit[-1] = 2.0
+    #First index whose stacked percent reaches each random choice
+    if useSus:
+        picks = np.searchsorted(cumulFit, (rng.random() + np.arange(len(cell))) / len(cell))
+        rng.shuffle(picks)
+    else:
+        picks = np.searchsorted(cumulFit, rng.random(len(cell)))
+    return picks
+
+#Crossover process for a new generation
+#Swaps the leading genes of every pair chosen for crossover in one step
+def _npCrossNewGen(cell, rng, pointCross, prob):
+    #Warn if crossover will not change either point meaningfully
+    if pointCross == 0 or pointCross >= cell.shape[1]:
+        print("Warning: crossover will not change points.")
+        print("    Reconsider your point crossover value.")
+        pointCross = cell.shape[1]
+    #Working with pairs, not including the last element if length is odd
+    halfLength = len(cell) // 2
+    firstVals = 2 * np.flatnonzero(rng.random(halfLength) < prob)
+    secondVals = firstVals + 1
+    swap = cell[firstVals, :pointCross]
+    cell[firstVals, :pointCross] = cell[secondVals, :pointCross]
+    cell[secondVals, :pointCross] = swap
+
+#Mutation process for a new generation
+#Follows _getMutatedValue for every chosen gene at once
+def _npMutateNewGen(cell, rng, prob, alpha, minVal = -1.0, maxVal = 5.0):
+    rows, cols = np.nonzero(rng.random(cell.shape) < prob)
+    values = cell[rows, cols]
+    bounds = maxVal - minVal
+    sign = np.where(rng.random(len(values)) < .5, -1.0, 1.0)
+    tempVals = np.full(len(values), maxVal + 1)
+    #Retry values still outside bounds, up to 5 attempts
+    for count in range(5):
+        redo = (tempVals < minVal) | (tempVals > maxVal)
+        if not redo.any():
+            break
+        modifier = rng.random(int(redo.sum())) * alpha * sign[redo] * bounds
+        tempVals[redo] = values[redo] + modifier
+    #Clamp mutated values to min or max if still outside bounds
+    cell[rows, cols] = np.clip(tempVals, minVal, maxVal)
+
+#Process a new generation using the previous one
+#Selected parents are gathered straight into the preallocated spare array,
+#which crossover and mutation then change in place
+#Returns the new generation and the old one to reuse as the next spare
+def _npGenerateNewGen(cell, spare, rng, isMaxFitness = True, pointCross = 1, probC = .8, probM = .1,
+                      alpha = .01, useSus = False, evaluator = None):
+    picks = _npSelectNewGen(cell, rng, isMaxFitness, useSus, evaluator)
+    np.take(cell, picks, axis = 0, out = spare)
+    _npCrossNewGen(spare, rng, pointCross, probC)
+    _npMutateNewGen(spare, rng, probM, alpha)
+    return spare, cell
+
+#Stores the fitness data of an array generation in a SingleRunResults class
+#Vectors are stored as lists so printing works the same for both engines
+def _npAddResults(storeRun, currentGen, cell, evaluator = None):
+    fitData = _npGetFitnessData(cell, evaluator)
+    highVector = cell[fitData['High Fit Index']].tolist()
+    lowVector = cell[fitData['Low Fit Index']].tolist()
+    storeRun.addGenResults(currentGen, fitData['High Fit'], highVector,
+                           fitData['Low Fit'], lowVector, fitData['Average Fit'])
+    storeRun.addBestOfRun(fitData['High Fit'], highVector, fitData['Low Fit'], lowVector)
+
+#Run through a number of generations with the NumPy engine
+#Reports on the same generations as singleRun
+def _npSingleRun(storeRun, numGens, popSize, chromoSize, useSus, evaluator = None):
+    isMaxFitness = storeRun.getIsMaxFitness()
+    rng = np.random.default_rng(storeRun.randomSeed)
+    cell = _npInitialGen(rng, popSize, chromoSize, -1.0, 5.0)
+    spare = np.empty_like(cell)
+    _npAddResults(storeRun, 0, cell, evaluator)
+    for i in range(numGens):
+        cell, spare = _npGenerateNewGen(cell, spare, rng, isMaxFitness, useSus = useSus,
+                                        evaluator = evaluator)
+        if (i + 1) % 10 == 0:
+            _npAddResults(storeRun, i + 1, cell, evaluator)
+
+#Stores the fitness data of a generation in a SingleRunResults class
+#Selection keeps chromosome lists alive across generations, so the stored
+#vectors are copies that later crossover and mutation cannot change
+def _addResults(storeRun, currentGen, cell, evaluator = None):
+    fitData = _getFitnessData(cell, evaluator)
+    highVector = cell[fitData['High Fit Index']][:]
+    lowVector = cell[fitData['Low Fit Index']][:]
+    storeRun.addGenResults(currentGen, fitData['High Fit'], highVector,
+                           fitData['Low Fit'], lowVector, fitData['Average Fit'])
+    storeRun.addBestOfRun(fitData['High Fit'], highVector, fitData['Low Fit'], lowVector)
+
 #Run through a number of generations
 #Report feedback every 10 generations, and on the final one
 #Expects a SingleRunResults class
-def singleRun(storeRun, numGens = 50):
+#useNumpy switches to the array engine, popSize defaults to numGens as before
+#useSus switches selection to stochastic universal sampling
+#evaluator, if given, gets the fitness values of each generation
+def singleRun(storeRun, numGens = 50, useNumpy = False, popSize = None, chromoSize = 3, useSus = False,
+              evaluator = None):
+    if popSize is None:
+        popSize = numGens
+    if useNumpy:
+        if np is not None:
+            _npSingleRun(storeRun, numGens, popSize, chromoSize, useSus, evaluator)
+            return
+        print("Warning: NumPy is not installed, using the list engine instead.")
     isMaxFitness = storeRun.getIsMaxFitness()
-    cell = _initialGen(numGens, 3, -1.0, 5.0)
-    fitData = _getFitnessData(cell)
-    storeRun.addGenResults(0, fitData['High Fit'], cell[fitData['High Fit Index']],
-                           fitData['Low Fit'], cell[fitData['Low Fit Index']],
-                           fitData['Average Fit'])
-    storeRun.addBestOfRun(fitData['High Fit'], cell[fitData['High Fit Index']],
-                          fitData['Low Fit'], cell[fitData['Low Fit Index']])
+    cell = _initialGen(popSize, chromoSize, -1.0, 5.0)
+    _addResults(storeRun, 0, cell, evaluator)
     for i in range(numGens):
-        _generateNewGen(cell, isMaxFitness)
+        _generateNewGen(cell, isMaxFitness, useSus = useSus, evaluator = evaluator)
         #print("\nCell # %d" % (i + 1))
         #pprint.pprint(cell)
         if (i + 1) % 10 is 0:
-            fitData = _getFitnessData(cell)
-            storeRun.addGenResults(i + 1, fitData['High Fit'], cell[fitData['High Fit Index']],
-                                   fitData['Low Fit'], cell[fitData['Low Fit Index']],
-                                   fitData['Average Fit'])
-            storeRun.addBestOfRun(fitData['High Fit'], cell[fitData['High Fit Index']],
-                                  fitData['Low Fit'], cell[fitData['Low Fit Index']])
+            _addResults(storeRun, i + 1, cell, evaluator)
+
+#Seeds and completes one run, returning its SingleRunResults
+#Kept at module level so worker processes can import it
+def _runWorker(job):
+    (seed, numGens, isMaxFitness, useNumpy, useSus, evaluator, resultsPath, append,
+     popSize, chromoSize) = job
+    random.seed(seed)
+    sink = None
+    if resultsPath is not None:
+        sink = ResultsWriter(resultsPath, append)
+    storeRun = SingleRunResults(numGens, seed, isMaxFitness, sink)
+    singleRun(storeRun, numGens, useNumpy, popSize, chromoSize, useSus, evaluator)
+    storeRun.closeResults()
+    return storeRun
+
+#Does one run in a worker process of generateRuns
+#The job's evaluator is this worker's own copy, so any pool or event loop it
+#made for the run is closed before the next job brings a new copy
+def _pooledRunWorker(job):
+    evaluator = job[5]
+    try:
+        return _runWorker(job)
+    finally:
+        if evaluator is not None:
+            evaluator.close()
 
 seeds = [ 54,  30, 101,  67,  34,
           22,  99,  32,  43,  95,
@@ -423,11 +812,28 @@ seeds = [ 54,  30, 101,  67,  34,
            8, 238, 234, 995, 204,
          899, 375, 112, 276, 419]
 
-moreRuns = RunCollection(30)
-for i in range(moreRuns.getMaxRuns()):
-    random.seed(seeds[i])
-    singleRun(moreRuns.addAndUseRun(50, seeds[i], False))
-moreRuns.print()
-#moreRuns.csvPrint()
-
+#Set to True to run the NumPy array engine instead of the list engine
+useNumpy = False
+#Set to True to select with stochastic universal sampling instead of the roulette wheel
+useSus = False
+#Number of worker processes for the runs, 1 runs them all in this process
+numWorkers = 1
+#Individuals per generation, None uses the number of generations
+popSize = None
+#Values in each chromosome
+chromoSize = 3
+#How each generation's fitness values are evaluated, see Evaluator
+backend = 'serial'
+#Threads or processes for the thread and process backends, None for the default
+evalWorkers = None
+#File to stream each generation's results to, .csv or .jsonl. None keeps them in memory
+resultsPath = None
+
+if __name__ == '__main__':
+    evaluator = Evaluator(_fitness, backend, evalWorkers)
+    moreRuns = RunCollection(30, useNumpy, useSus, evaluator, resultsPath)
+    moreRuns.generateRuns(seeds, 50, False, numWorkers, popSize, chromoSize)
+    evaluator.close()
+    moreRuns.print()
+    #moreRuns.csvPrint()
 
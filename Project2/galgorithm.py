@@ -9,12 +9,21 @@
 # usage:
 # SoderstromJProject2.py
 # SoderstromJProject2.py -f filename
-# SoderstromJProject2.py [-h] -l L [-m {t,f}] [-s {0,1,2}] Minimum Maximum
+# SoderstromJProject2.py [-h] -l L [-m {t,f}] [-s {0,1,2,3}] [-p P] [-x {0,1,2}] [-w W] [-t T]
+#                           [-c C] [-o O] Minimum Maximum
 #                           PopSize NumRuns NumGens CrossPoint PCross PMut RandomSeed
 #
 #       -l L        Repeatable, integers > 0. The number of bits for each value.
 #       -m {t,f}    Maximum fitness value is preferred. True or False.
-#       -s {0,1,2}  Selection method. Proportional, Binary Tournament, Linear Ranking.
+#       -s {0,1,2,3} Selection method. Proportional, Binary Tournament, Linear Ranking,
+#                   Stochastic Universal Sampling.
+#       -p P        Selection pressure for Linear Ranking, 1.0 - 2.0. Defaults to 2.0.
+#       -x {0,1,2}  Crossover method. One Point, Two Point, Uniform.
+#       -w W        Number of worker processes for the runs. Defaults to 1.
+#       -t T        Bytes of memory for fitness lookup tables. Defaults to 0, no tables.
+#       -c C        Entries in the fitness cache of each run. Defaults to 0, no cache.
+#       -o O        File to stream each generation's results to, .csv or .jsonl.
+#                   With more than 1 worker, each run writes its own file.
 #       Minimum     The minimum value a bitstring can be.
 #       Maximum     The maximum value a bitstring can be.
 #       PopSize     The number of chromosomes in a generation.
@@ -37,9 +46,16 @@
 #   P_Mut:          Probability that mutation will occur on each bit. 0 - 1.
 #   RandomSeed:     Initial seed for randomizer, integer 0 - 999.
 #   (Optional below)
-#   Selection:      Selection method. Proportional, Binary Tournament, Linear Ranking.
-#                    {0, 1, 2} Defaults to 0, Proportional.
+#   Selection:      Selection method. Proportional, Binary Tournament, Linear Ranking,
+#                    Stochastic Universal Sampling. {0, 1, 2, 3} Defaults to 0, Proportional.
+#   Pressure:       Selection pressure for Linear Ranking, 1.0 - 2.0. Defaults to 2.0.
+#   Crossover:      Crossover method. One Point, Two Point, Uniform.
+#                    {0, 1, 2} Defaults to 0, One Point at CrossPoint.
 #   MaxFitness:     Maximum fitness value is preferred. {t, f} True or False.
+#   Workers:        Number of worker processes for the runs. Defaults to 1.
+#   TableMemory:    Bytes of memory for fitness lookup tables. Defaults to 0, no tables.
+#   CacheSize:      Entries in the fitness cache of each run. Defaults to 0, no cache.
+#   Results:        File to stream each generation's results to, .csv or .jsonl.
 #
 # Not perfect, error reporting for input is not quite complete. But errors are checked,
 # and multiple methods of input are allowed.
@@ -52,9 +68,11 @@
 # best of runs are printed to the screen.
 #################################################
 
-import random, argparse, sys, getopt
+import random, argparse, sys, getopt, math, csv, json, os
+from array import array
+from bisect import bisect_left
+from concurrent.futures import ProcessPoolExecutor
 from pprint import pprint as pp
-from copy import deepcopy
 from collections import OrderedDict as od
 
 ###
@@ -64,11 +82,13 @@ from collections import OrderedDict as od
 class RunCollection:
     # Initialize with the number of runs, issuing a warning if the number is exceeded
     # Sets up a dictionary to store individual run data
-    def __init__(self, maxRuns, vectorLengths):
+    # resultsPath streams each generation's results to a file, see generateRuns
+    def __init__(self, maxRuns, vectorLengths, resultsPath = None):
         self.maxRuns = maxRuns
         self.currentRun = 0
         self.allRunData = od()
         self.vectorLengths = vectorLengths
+        self.resultsPath = resultsPath
 
     # Adds an empty run to the dictionary if there is room and returns it
     # Issues a warning if another would exceed the maximum number
@@ -83,6 +103,47 @@ class RunCollection:
             print("Warning: more runs than expected, user wanted max of %d runs." % self.numRuns)
             return None
 
+    # Adds a finished run to the dictionary if there is room, as addAndUseRun does
+    def addRun(self, storeRun):
+        if self.currentRun < self.maxRuns:
+            self.currentRun += 1
+            self.allRunData['Run ' + str(self.currentRun)] = storeRun
+            return storeRun
+        else:
+            print("Warning: more runs than expected, user wanted max of %d runs." % self.maxRuns)
+            return None
+
+    # Seeds and runs every remaining run, one seed per run
+    # With more than one worker the runs are spread over a process pool. Each
+    # run is seeded inside its worker and results are added back in run order,
+    # so the output matches running them one after another.
+    # With resultsPath set, generation results are streamed to it instead of
+    # kept in memory. Runs in this process share the file one after another.
+    # Runs in workers each get their own file, with the run number put in
+    # place of {} in the path, or before the extension if there is no {}.
+    def generateRuns(self, seeds, numGens, pointCross, probCross, probMut, minVal, maxVal,
+                     selChoice, isMaxFitness = True, numWorkers = 1, tableMemory = 0, cacheSize = 0,
+                     pressure = 2.0, crossChoice = 0):
+        jobs = []
+        for i in range(self.currentRun, self.maxRuns):
+            path = self.resultsPath
+            append = False
+            if path is not None:
+                if numWorkers > 1 or '{}' in path:
+                    path = _runResultsPath(path, i + 1)
+                else:
+                    append = i > self.currentRun
+            jobs.append((seeds[i], numGens, self.vectorLengths, pointCross, probCross, probMut,
+                         minVal, maxVal, selChoice, isMaxFitness, tableMemory, cacheSize, pressure,
+                         crossChoice, path, append))
+        if numWorkers > 1:
+            with ProcessPoolExecutor(max_workers = numWorkers) as pool:
+                for storeRun in pool.map(_runWorker, jobs):
+                    self.addRun(storeRun)
+        else:
+            for job in jobs:
+                self.addRun(_runWorker(job))
+
     # Allows access to any run added before the current run in case it is needed
     def getRunNum(self, num):
         if num > 0 and num <= self.currentRun:
@@ -105,10 +166,14 @@ class RunCollection:
         self.vecOfBest = self.getRunNum(3).bestOfRun['Best Vector']
         self.meanOfBest = 0
         self.stdOfBest = 0
+        self.cacheHits = 0
+        self.cacheMisses = 0
 
         # Get average of best of runs, and store the best of the best
         for key, val in self.allRunData.items():
             self.meanOfBest += val.bestOfRun['Best Fitness']
+            self.cacheHits += val.cacheHits
+            self.cacheMisses += val.cacheMisses
             if self.bestOfBest > val.bestOfRun['Best Fitness']:
                 self.bestOfBest = val.bestOfRun['Best Fitness']
                 self.vecOfBest = val.bestOfRun['Best Vector']
@@ -129,28 +194,33 @@ class RunCollection:
         print("Best of Best of Runs: {}".format(self.bestOfBest))
 
         # Separate vector into bit strings
-        breakPoint = sum(self.vectorLengths)
-        for count, i in enumerate(self.vectorLengths):
-            breakPoint -= i
-            tempVal = int(self.vecOfBest / (2 ** breakPoint))
-            tempVal = int(tempVal % (2 ** i))
+        decoder = BitDecoder(self.vectorLengths)
+        for count, (i, tempVal) in enumerate(zip(self.vectorLengths, decoder.decode(self.vecOfBest))):
             state = "  X{}: ".format(count)
             formatLength = "0{}b".format(i)
             state += format(tempVal, formatLength)
             print(state)
 
+        if self.cacheHits or self.cacheMisses:
+            print("Fitness Cache Hits: {}, Misses: {}".format(self.cacheHits, self.cacheMisses))
+
 ###        
 # Stores data from a single GA run
 # Initializes with the number of generations to run, stores the random seed,
 # and if we want to min or max the fitness values
+# With a ResultsWriter as sink, generation results are written to it as they
+# come in rather than stored, so memory stays the same however long the run
 ###
 class SingleRunResults:
-    def __init__(self, numGens, randomSeed, isMaxFitness = True):
+    def __init__(self, numGens, randomSeed, isMaxFitness = True, sink = None):
         self.numGens = numGens
         self.randomSeed = randomSeed
         self.isMaxFitness = isMaxFitness
         self.bestOfRun = {'Best Fitness' : None}
         self.genResults = od()
+        self.sink = sink
+        self.cacheHits = 0
+        self.cacheMisses = 0
 
     # Returns the dictionary of all data from the run
     def getGenResults(self):
@@ -162,7 +232,18 @@ class SingleRunResults:
         tempDict = {'High Fitness' : highFit, 'High Fitness Vector' : hfVector,
                     'Low Fitness' : lowFit, 'Low Fitness Vector' : lfVector,
                     'Average Fitness' : avgFit}
-        self.genResults['Generation ' + str(currentGen)] = tempDict
+        if self.sink is not None:
+            record = {'Random Seed' : self.randomSeed, 'Generation' : currentGen}
+            record.update(tempDict)
+            self.sink.write(record)
+        else:
+            self.genResults['Generation ' + str(currentGen)] = tempDict
+
+    # Closes the sink, if any, once the run is done
+    def closeResults(self):
+        if self.sink is not None:
+            self.sink.close()
+            self.sink = None
 
     # Returns the fitness value and vector of the current best of run, if any exist
     def getBestOfRun(self):
@@ -184,32 +265,187 @@ class SingleRunResults:
     def getIsMaxFitness(self):
         return self.isMaxFitness
 
+    # Stores the hit and miss counts of the run's fitness cache
+    def setCacheStats(self, cache):
+        if cache is not None:
+            self.cacheHits = cache.hits
+            self.cacheMisses = cache.misses
+
+###
+# Streams generation results to a file as they are produced
+# Records are written as JSON lines, or as CSV rows after a header row if the
+# path ends in .csv. The file is flushed every flushEvery records so it can be
+# followed while a run is going. With append, records go after those already
+# in the file.
+###
+class ResultsWriter:
+    def __init__(self, path, append = False, flushEvery = 100):
+        self.path = path
+        self.flushEvery = flushEvery
+        self.pending = 0
+        self.file = open(path, 'a' if append else 'w', newline = '')
+        self.csvWriter = None
+        if path.lower().endswith('.csv'):
+            self.csvWriter = csv.writer(self.file)
+            self.needHeader = self.file.tell() == 0
+
+    # Writes one record, a dictionary with the same keys every time
+    def write(self, record):
+        if self.csvWriter is not None:
+            if self.needHeader:
+                self.csvWriter.writerow(record.keys())
+                self.needHeader = False
+            self.csvWriter.writerow(record.values())
+        else:
+            self.file.write(json.dumps(record) + '\n')
+        self.pending += 1
+        if self.pending >= self.flushEvery:
+            self.flush()
+
+    # Pushes buffered records out to the file
+    def flush(self):
+        self.file.flush()
+        self.pending = 0
+
+    # Flushes and closes the file
+    def close(self):
+        self.file.close()
+
+###
+# Path for the results of one run, see RunCollection.generateRuns
+###
+def _runResultsPath(path, runNumber):
+    if '{}' in path:
+        return path.format(runNumber)
+    root, ext = os.path.splitext(path)
+    return root + '.run' + str(runNumber) + ext
+
+###
+# Bounded cache of fitness values keyed on the chromosome
+# Chromosomes are ints, so they can be used as keys directly. The least recently
+# used entry is dropped once capacity is reached. Hits and misses are counted
+# to show how many evaluations were saved.
+###
+class FitnessCache:
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.hits = 0
+        self.misses = 0
+        self.entries = od()
+
+    # Returns the stored value, or None if the chromosome is not cached
+    def get(self, chromo):
+        result = self.entries.get(chromo)
+        if result is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self.entries.move_to_end(chromo)
+        return result
+
+    # Stores a value, dropping the least recently used entry if full
+    def put(self, chromo, result):
+        self.entries[chromo] = result
+        if len(self.entries) > self.capacity:
+            self.entries.popitem(last = False)
+
+###
+# Splits chromosomes into their bitstrings and scales them to real values
+# Shifts, masks, and scales for every bitstring are worked out once per run.
+# Bitstrings are read with integer shifts and masks, so decoding stays exact
+# for chromosomes of any length.
+#
+# With tableMemory above 0, squared values are kept in lookup tables for
+# bitstring lengths that fit in that many bytes (8 per possible value),
+# shortest lengths first. Tables are filled in as values come up, and longer
+# bitstrings are always computed directly.
+#
+# With cacheSize above 0, the decoder also carries a FitnessCache shared by
+# every fitness evaluation of the run.
+###
+class BitDecoder:
+    def __init__(self, lengths, minVal = 0.0, maxVal = 1.0, tableMemory = 0, cacheSize = 0):
+        self.lengths = lengths
+        self.totalLength = sum(lengths)
+        self.minVal = minVal
+        self.diff = maxVal - minVal
+        if self.diff < 0:
+            print("WARNING: min and max values are reversed")
+
+        # Store (shift, mask, scale) for each bitstring, leftmost first
+        self.segments = []
+        breakPoint = self.totalLength
+        for i in lengths:
+            breakPoint -= i
+            self.segments.append((breakPoint, (1 << i) - 1, 1 << i))
+        self._buildTables(tableMemory)
+        self.cache = None
+        if cacheSize > 0:
+            self.cache = FitnessCache(cacheSize)
+
+    # Set up an empty table for each bitstring length within the memory cap
+    # Bitstrings of the same length share a table. NaN marks entries not yet filled.
+    def _buildTables(self, tableMemory):
+        lengthTables = {}
+        for i in sorted(set(self.lengths)):
+            tableSize = 8 << i
+            if tableSize > tableMemory:
+                break
+            tableMemory -= tableSize
+            lengthTables[i] = array('d', [float('nan')]) * (1 << i)
+        self.tables = [lengthTables.get(i) for i in self.lengths]
+
+    # Returns the integer value of every bitstring, leftmost first
+    def decode(self, chromo):
+        return [(chromo >> shift) & mask for shift, mask, scale in self.segments]
+
+    # Returns every bitstring scaled between the min and max values
+    # Dividing two ints rounds correctly even past 53 bits
+    def values(self, chromo):
+        return [self.diff * (((chromo >> shift) & mask) / scale) + self.minVal
+                for shift, mask, scale in self.segments]
+
+    # Returns the square of every scaled bitstring, using lookup tables where built
+    def squares(self, chromo):
+        result = []
+        for (shift, mask, scale), table in zip(self.segments, self.tables):
+            tempVal = (chromo >> shift) & mask
+            if table is None:
+                result.append((self.diff * (tempVal / scale) + self.minVal) ** 2)
+            else:
+                square = table[tempVal]
+                # NaN is the only value not equal to itself
+                if square != square:
+                    square = (self.diff * (tempVal / scale) + self.minVal) ** 2
+                    table[tempVal] = square
+                result.append(square)
+        return result
+
 ###
 # Fitness function for the project
 # Returns fitness value of a bit string
-# Takes full bitstring, list of bit string lengths, and min/max values
+# Takes full bitstring and the BitDecoder for the run
+# Checks the run's fitness cache first, if it has one
 ###
-def _fitness(chromo, lengths, minVal, maxVal):
+def _fitness(chromo, decoder):
+    if decoder.cache is not None:
+        fit = decoder.cache.get(chromo)
+        if fit is not None:
+            return fit
     fit = 0
-    diff = maxVal - minVal
-    if diff < 0:
-        print("WARNING: min and max values are reversed")
-    breakPoint = sum(lengths)
-    for i in lengths:
-        breakPoint -= i
-        tempVal = int(chromo / (2 ** breakPoint))
-        tempVal = int(tempVal % (2 ** i))
-        tempVal /= (2 ** i)
-        fit += (diff * tempVal + minVal) ** 2
+    for square in decoder.squares(chromo):
+        fit += square
+    if decoder.cache is not None:
+        decoder.cache.put(chromo, fit)
     return fit
 
 ###
 # Obtain a list of fitness values for a generation
 ###
-def _getFitnessValues(listVal, lengths, minVal, maxVal):
+def _getFitnessValues(listVal, decoder):
     fitList = []
     for i in listVal:
-        fitList.append(_fitness(i, lengths, minVal, maxVal))
+        fitList.append(_fitness(i, decoder))
     return fitList
 
 ###
@@ -262,8 +498,8 @@ def _percentFitness(fitList):
 # Obtain fitness data about a generation
 # Returns a dictionary including indices of the best and worst chromosomes
 ###
-def _getFitnessData(listVal, vectorLengths, minVal, maxVal):
-    fitList = _getFitnessValues(listVal, vectorLengths, minVal, maxVal)
+def _getFitnessData(listVal, decoder):
+    fitList = _getFitnessValues(listVal, decoder)
     fitData = {}
     for index, i in enumerate(fitList):
         # Initialize fitData to first fitness value
@@ -303,41 +539,65 @@ def _initialGen(popSize, chromoSize):
         initGen.append(initial)
     return initGen
 
+###
+# Roulette wheel picks from a list of stacking percentages
+# Binary search finds the first percent range our random choice is in, the same
+# index a scan from the start would stop on, in O(log n) per pick
+###
+def _rouletteIndices(cumulFit, count):
+    return [bisect_left(cumulFit, random.random()) for i in range(count)]
+
+###
+# Stochastic universal sampling from a list of stacking percentages
+# A single random number places count evenly spaced pointers, which are walked
+# through the percent ranges in one pass. The picks come out in index order,
+# so they are shuffled to keep crossover from pairing copies of one chromosome.
+###
+def _susIndices(cumulFit, count):
+    start = random.random() / count
+    picks = []
+    copyIndex = 0
+    for i in range(count):
+        pointer = start + i / count
+        while pointer > cumulFit[copyIndex]:
+            copyIndex += 1
+        picks.append(copyIndex)
+    random.shuffle(picks)
+    return picks
+
+###
+# Fills the generation in place from a list of parent indices
+# Chromosomes are immutable ints, so the new generation only holds references
+# to the selected parents and nothing is copied
+###
+def _applySelection(prevGen, picks):
+    prevGen[:] = [prevGen[copyIndex] for copyIndex in picks]
+
 ###
 # Selection process, proportional, for a new generation
+# useSus draws the whole selection with stochastic universal sampling
 ###
-def _selectProportNewGen(prevGen, lengths, minVal, maxVal, isMaxFit):
-    indices = range(len(prevGen))
+def _selectProportNewGen(prevGen, decoder, isMaxFit, useSus = False):
     # Get a list of all fitness values and convert to percents
     # Reverse fitness values if attempting to minimize fitness
-    fitnessVals = _getFitnessValues(prevGen, lengths, minVal, maxVal)
+    fitnessVals = _getFitnessValues(prevGen, decoder)
     if not isMaxFit:
         _minModFitness(fitnessVals)
     _percentFitness(fitnessVals)
-            
-    # Create a new list using percentages in selection
-    tempList = []
-    for i in indices:
-        copyIndex = 0
-        randomChoice = random.random()
-        # randomChoice will never be > 1, so this loop will always end before
-        # out of range errors
-        # Ends when we reach the percent range our randomChoice is in
-        while randomChoice > fitnessVals[copyIndex]:
-            copyIndex += 1
-        # Avoids copying references, prevents manipulating multiple lines at once
-        tempList.append(deepcopy(prevGen[copyIndex]))
 
-    # Set our new selection list to the input
-    for i in indices:
-        prevGen[i] = tempList[i]
+    # Create a new list using percentages in selection
+    if useSus:
+        picks = _susIndices(fitnessVals, len(prevGen))
+    else:
+        picks = _rouletteIndices(fitnessVals, len(prevGen))
+    _applySelection(prevGen, picks)
 
 ###
 # Selection process, binary tournament, for a new generation
 ###
-def _selectBinTourNewGen(prevGen, lengths, minVal, maxVal, isMaxFit):
+def _selectBinTourNewGen(prevGen, decoder, isMaxFit):
     popSize = len(prevGen)
-    tempList = []
+    picks = []
 
     for i in range(popSize):
         tour1 = random.randint(0, popSize - 1)
@@ -345,8 +605,8 @@ def _selectBinTourNewGen(prevGen, lengths, minVal, maxVal, isMaxFit):
         # Ensure that two different entries are selected
         while tour1 is tour2:
             tour2 = random.randint(0, popSize - 1)
-        fit1 = _fitness(prevGen[tour1], lengths, minVal, maxVal)
-        fit2 = _fitness(prevGen[tour2], lengths, minVal, maxVal)
+        fit1 = _fitness(prevGen[tour1], decoder)
+        fit2 = _fitness(prevGen[tour2], decoder)
 
         # Flip fitness values for consideration if the smaller is better
         if not isMaxFit:
@@ -355,79 +615,68 @@ def _selectBinTourNewGen(prevGen, lengths, minVal, maxVal, isMaxFit):
 
         # Select the chromosome with better fitness of the two to add
         if fit1 > fit2:
-            tempList.append(deepcopy(prevGen[tour1]))
+            picks.append(tour1)
         else:
-            tempList.append(deepcopy(prevGen[tour2]))
+            picks.append(tour2)
 
-    # Set our new selection list to the input
-    for i in range(popSize):
-        prevGen[i] = tempList[i]
+    _applySelection(prevGen, picks)
 
 ###
 # Selection process, linear ranking, for a new generation
+# Chromosomes are ranked with one sort, worst first. The sort is stable, so
+# ties keep their order in the generation and the earlier chromosome gets
+# the lower rank. Pressure is the expected number of picks for the best
+# chromosome, from 1.0 (every rank equal) to 2.0 (worst is never picked).
 ###
-def _selectLinRankNewGen(prevGen, lengths, minVal, maxVal, isMaxFit):
-    fitnessVals = _getFitnessValues(prevGen, lengths, minVal, maxVal)
+def _selectLinRankNewGen(prevGen, decoder, isMaxFit, pressure = 2.0):
+    fitnessVals = _getFitnessValues(prevGen, decoder)
     totalVals = len(prevGen)
-    #Flip fitness values for ranking if smaller fitness values are better
+    # Flip fitness values for ranking if smaller fitness values are better
     if not isMaxFit:
         for count, i in enumerate(fitnessVals):
             fitnessVals[count] = i * -1
-    
-    # Replace fitness values with ranks from 0 to number of chromosomes - 1
-    # A separate list is needed to store ranks while keeping values to check against
-    tempFit = fitnessVals.copy()
-    for count, i in enumerate(tempFit):
-        rank = 0
-        for j in tempFit:
-            if i > j:
-                rank += 1
-        fitnessVals[count] = rank
-    
-    tempInc = {}
-    # Fill blanks with values based on duplicate ranks
-    # Use a dictionary to store the number of times each value comes up
-    # and increment a duplicate by that number
-    for count, i in enumerate(fitnessVals):
-        if i not in tempInc.keys():
-            tempInc[i] = 0
-        else:
-            tempInc[i] += 1
-            fitnessVals[count] += tempInc[i]
 
-    probSelect = fitnessVals.copy()
+    # Indices of the chromosomes ordered from rank 0 (worst) to the best
+    ranked = sorted(range(totalVals), key = fitnessVals.__getitem__)
+
     # Set probability for each rank, then make it cumulative
     # Cumulative probability will make selecting an entry easier
+    probSelect = []
     cumulProb = 0
-    for count, i in enumerate(probSelect):
-        probSelect[count] = cumulProb + ((2 * count / (totalVals - 1)) / totalVals)
-        cumulProb = probSelect[count]
+    for rank in range(totalVals - 1):
+        cumulProb += (2 - pressure + 2 * (pressure - 1) * rank / (totalVals - 1)) / totalVals
+        probSelect.append(cumulProb)
     # Increase last probability in case of edge case errors
-    probSelect[totalVals - 1] = 2.0
-    
-    tempList = []
-    # Select entries for a new generation
-    for i in range(totalVals):
-        copyIndex = 0
-        randomChoice = random.random()
-        while randomChoice > probSelect[copyIndex]:
-            copyIndex += 1
-        print(copyIndex)
-        # Use copy index to get the index of our actual selection from fitnessVals
-        # fitnessVals replaced values with ranks from 0 to total chromosomes - 1
-        # in order to get the correct index now
-        tempList.append(deepcopy(prevGen[fitnessVals[copyIndex]]))
+    probSelect.append(2.0)
+
+    # Select ranks by binary search, then map each rank back to its chromosome
+    picks = [ranked[rank] for rank in _rouletteIndices(probSelect, totalVals)]
+    _applySelection(prevGen, picks)
 
-    # Set our new selection list to the input
-    for i in range(totalVals):
-        prevGen[i] = tempList[i]
+###
+# Mask of the bits between two random cut points for two point crossover
+# The low masks of the two points differ exactly between them. Equal points
+# give an empty mask and leave the pair as it was. So does a string too short
+# to have a cut point inside it.
+###
+def _twoPointMask(totalLength):
+    if totalLength < 2:
+        return 0
+    point1 = random.randint(1, totalLength - 1)
+    point2 = random.randint(1, totalLength - 1)
+    return ((1 << point1) - 1) ^ ((1 << point2) - 1)
 
 ###
 # Crossover process for a new generation
+# Each pair swaps the bits under a mask: the low bits after the crossover point
+# for one point, the bits between two random points for two point, or random
+# bits for uniform. Bits that differ under the mask are found with one XOR and
+# AND and flipped in both chromosomes, so a pair costs a few int operations.
 ###
-def _crossNewGen(prevGenSelect, totalLength, pointCross, prob):
+def _crossNewGen(prevGenSelect, totalLength, pointCross, prob, crossChoice = 0):
     crossCount = 0
-    pointCross = totalLength - pointCross
+    # Low mask covering every bit after the crossover point
+    lowMask = (1 << (totalLength - pointCross)) - 1
     # Working with pairs, not including the last element if length is odd
     halfLength = int(len(prevGenSelect) / 2)
     for i in range(halfLength):
@@ -437,390 +686,492 @@ def _crossNewGen(prevGenSelect, totalLength, pointCross, prob):
             # Calculate indices of two elements to swap
             firstVal = 2 * i
             secondVal = firstVal + 1
-            # Swap bitstrings at crossover point
-            # Two variables used to avoid copying issues with list references
-            swap1 = prevGenSelect[firstVal]
-            swap2 = prevGenSelect[secondVal]
-            prevGenSelect[secondVal] = int((prevGenSelect[secondVal] / (2 ** pointCross)))<<pointCross
-            prevGenSelect[firstVal] = int((prevGenSelect[firstVal] / (2 ** pointCross)))<<pointCross
-            for j in range(pointCross + 1):
-                prevGenSelect[secondVal] = prevGenSelect[secondVal] | (swap1 % (2 ** j))
-                prevGenSelect[firstVal] = prevGenSelect[firstVal] | (swap2 % (2 ** j))
+            if crossChoice == 1:
+                mask = _twoPointMask(totalLength)
+            elif crossChoice == 2:
+                mask = random.getrandbits(totalLength)
+            else:
+                mask = lowMask
+            # Swap bitstrings under the mask
+            swap = (prevGenSelect[firstVal] ^ prevGenSelect[secondVal]) & mask
+            prevGenSelect[firstVal] ^= swap
+            prevGenSelect[secondVal] ^= swap
+
+###
+# Builds a mask of the bits to flip in one chromosome
+# Rather than a random draw for every bit, the gap to the next flipped bit is
+# drawn from a geometric distribution, so there is one draw per flip. Each bit
+# is still flipped independently with the mutation probability.
+# logKeep is log(1 - probability), worked out once per generation
+###
+def _mutationMask(totalLength, logKeep):
+    mask = 0
+    n = int(math.log(1.0 - random.random()) / logKeep)
+    while n < totalLength:
+        mask |= 1<<n
+        n += int(math.log(1.0 - random.random()) / logKeep) + 1
+    return mask
 
 ###
 # Mutation process for a new generation
+# Flips the bits of each chromosome with a single XOR mask
 ###
 def _mutateNewGen(prevGenCross, totalLength, prob):
-    mutateCount = 0
+    if prob <= 0:
+        return
+    # Every bit flips, no need to draw gaps
+    if prob >= 1:
+        for index, i in enumerate(prevGenCross):
+            prevGenCross[index] = i ^ ((1 << totalLength) - 1)
+        return
+    # log1p keeps tiny probabilities from rounding to log(1.0) == 0
+    logKeep = math.log1p(-prob)
     for index, i in enumerate(prevGenCross):
-        for n in range(totalLength):
-            # Flip each bit based on random chance and given probability
-            if random.random() < prob:
-                i = i ^ 1<<n
         # Assign mutated bit string to the list
-        prevGenCross[index] = i
+        prevGenCross[index] = i ^ _mutationMask(totalLength, logKeep)
 
 ###
 # Process a new generation using the previous one
 # Cycles through selection, crossover, and mutation
 # Manipulates list directly so no returns are needed
 ###
-def _generateNewGen(prevGen, isMaxFitness, lengths, pointCross, probC, probM, minVal, maxVal, selChoice):
+def _generateNewGen(prevGen, isMaxFitness, decoder, pointCross, probC, probM, selChoice, pressure = 2.0,
+                    crossChoice = 0):
     if selChoice is 0:
-        _selectProportNewGen(prevGen, lengths, minVal, maxVal, isMaxFitness)
+        _selectProportNewGen(prevGen, decoder, isMaxFitness)
     elif selChoice is 1:
-        _selectBinTourNewGen(prevGen, lengths, minVal, maxVal, isMaxFitness)
+        _selectBinTourNewGen(prevGen, decoder, isMaxFitness)
+    elif selChoice == 3:
+        _selectProportNewGen(prevGen, decoder, isMaxFitness, True)
     else:
-        _selectLinRankNewGen(prevGen, lengths, minVal, maxVal, isMaxFitness)
-    _crossNewGen(prevGen, sum(lengths), pointCross, probC)
-    _mutateNewGen(prevGen, sum(lengths), probM)
+        _selectLinRankNewGen(prevGen, decoder, isMaxFitness, pressure)
+    _crossNewGen(prevGen, decoder.totalLength, pointCross, probC, crossChoice)
+    _mutateNewGen(prevGen, decoder.totalLength, probM)
+
+###
+# Stores the fitness data of a generation in a SingleRunResults class
+# fitData must come from cell as it is now, so the best of run is stored with
+# the vector its fitness belongs to.
+# Generation results are only kept when the run streams them to a sink.
+# Nothing reads them otherwise, and they would be sent back from workers.
+###
+def _addResults(storeRun, currentGen, cell, fitData):
+    highVector = cell[fitData['High Fit Index']]
+    lowVector = cell[fitData['Low Fit Index']]
+    if storeRun.sink is not None:
+        storeRun.addGenResults(currentGen, fitData['High Fit'], highVector,
+                               fitData['Low Fit'], lowVector, fitData['Average Fit'])
+    storeRun.addBestOfRun(fitData['High Fit'], highVector, fitData['Low Fit'], lowVector)
 
 ###
 # Run through a number of generations
 # Expects a SingleRunResults class
+# With a sink, every generation's fitness data is streamed to it, see
+# SingleRunResults
 ###
 def singleRun(storeRun, numGens, vectorLengths, pointCross, probCross, probMut, 
-              minVal, maxVal, selChoice):
+              minVal, maxVal, selChoice, tableMemory = 0, cacheSize = 0, pressure = 2.0,
+              crossChoice = 0):
     isMaxFitness = storeRun.getIsMaxFitness()
-    cell = _initialGen(30, sum(vectorLengths))
-    fitData = _getFitnessData(cell, vectorLengths, minVal, maxVal)
-    storeRun.addBestOfRun(fitData['High Fit'], cell[fitData['High Fit Index']],
-                          fitData['Low Fit'], cell[fitData['Low Fit Index']])
+    decoder = BitDecoder(vectorLengths, minVal, maxVal, tableMemory, cacheSize)
+    cell = _initialGen(30, decoder.totalLength)
+    _addResults(storeRun, 0, cell, _getFitnessData(cell, decoder))
     for i in range(numGens):
-        _generateNewGen(cell, isMaxFitness, vectorLengths, pointCross, probCross, probMut,
-                        minVal, maxVal, selChoice)
-        storeRun.addBestOfRun(fitData['High Fit'], cell[fitData['High Fit Index']],
-                              fitData['Low Fit'], cell[fitData['Low Fit Index']])
-
-# Initialize values and begin reading data from the user
-xLen = []
-minX = 0
-maxX = 0
-popSize = 0
-isMaxFitness = True
-pointCross = 0
-probCross = 0
-probMut = 0
-numRuns = 0
-numGens = 0
-selectionChoice = 0
-rSeed = 0
-
-# Get list of arguments for first two cases, -f filename or none
-argList = sys.argv[1:]
-
-manInput = False
-fileName = None
-try:
-    # No command line arguments pushes to manual input
-    if len(argList) is 0:
-        manInput = True
-
-    # If exactly 2 arguments are given, expect a filename
-    elif len(argList) is 2:
-        options = "hfs:"
-        args, values = getopt.getopt(argList, options)
-        for curArg, curVal in args:
-            if curArg in ('-f'):
-                fileName = argList[-1]
-
-    # With any other number, expect specific arguments to detail everything
-    else:
-        parser = argparse.ArgumentParser(description = 'Taking user input')
-        parser.add_argument('-l', action = 'append', required = True)
-        parser.add_argument('-m', default = 't', choices = ['t', 'f'])
-        parser.add_argument('-s', default = '0', choices = ['0', '1', '2'])
-        parser.add_argument('Minimum')
-        parser.add_argument('Maximum')
-        parser.add_argument('PopSize')
-        parser.add_argument('NumRuns')
-        parser.add_argument('NumGens')
-        parser.add_argument('CrossPoint')
-        parser.add_argument('PCross')
-        parser.add_argument('PMut')
-        parser.add_argument('RandomSeed')
-
-        args = parser.parse_args()
-
-        xLen = [int(i) for i in args.l]
-        if args.m is 't':
-            isMaxFitness = True
+        _generateNewGen(cell, isMaxFitness, decoder, pointCross, probCross, probMut, selChoice,
+                        pressure, crossChoice)
+        # Fitness of the new generation, not generation 0's
+        _addResults(storeRun, i + 1, cell, _getFitnessData(cell, decoder))
+    storeRun.setCacheStats(decoder.cache)
+
+###
+# Seeds and completes one run, returning its SingleRunResults
+# Kept at module level so worker processes can import it
+###
+def _runWorker(job):
+    (seed, numGens, vectorLengths, pointCross, probCross, probMut,
+     minVal, maxVal, selChoice, isMaxFitness, tableMemory, cacheSize, pressure, crossChoice,
+     resultsPath, append) = job
+    random.seed(seed)
+    sink = None
+    if resultsPath is not None:
+        sink = ResultsWriter(resultsPath, append)
+    storeRun = SingleRunResults(numGens, seed, isMaxFitness, sink)
+    singleRun(storeRun, numGens, vectorLengths, pointCross, probCross, probMut,
+              minVal, maxVal, selChoice, tableMemory, cacheSize, pressure, crossChoice)
+    storeRun.closeResults()
+    return storeRun
+
+if __name__ == '__main__':
+    # Initialize values and begin reading data from the user
+    xLen = []
+    minX = 0
+    maxX = 0
+    popSize = 0
+    isMaxFitness = True
+    pointCross = 0
+    probCross = 0
+    probMut = 0
+    numRuns = 0
+    numGens = 0
+    selectionChoice = 0
+    rSeed = 0
+    numWorkers = 1
+    tableMemory = 0
+    cacheSize = 0
+    pressure = 2.0
+    crossChoice = 0
+    resultsPath = None
+
+    # Get list of arguments for first two cases, -f filename or none
+    argList = sys.argv[1:]
+
+    manInput = False
+    fileName = None
+    try:
+        # No command line arguments pushes to manual input
+        if len(argList) is 0:
+            manInput = True
+
+        # If exactly 2 arguments are given, expect a filename
+        elif len(argList) is 2:
+            options = "hfs:"
+            args, values = getopt.getopt(argList, options)
+            for curArg, curVal in args:
+                if curArg in ('-f'):
+                    fileName = argList[-1]
+
+        # With any other number, expect specific arguments to detail everything
         else:
-            isMaxFitness = False
-        selectionChoice = int(args.s)
+            parser = argparse.ArgumentParser(description = 'Taking user input')
+            parser.add_argument('-l', action = 'append', required = True)
+            parser.add_argument('-m', default = 't', choices = ['t', 'f'])
+            parser.add_argument('-s', default = '0', choices = ['0', '1', '2', '3'])
+            parser.add_argument('-w', default = '1')
+            parser.add_argument('-t', default = '0')
+            parser.add_argument('-c', default = '0')
+            parser.add_argument('-p', default = '2.0')
+            parser.add_argument('-x', default = '0', choices = ['0', '1', '2'])
+            parser.add_argument('-o', default = None)
+            parser.add_argument('Minimum')
+            parser.add_argument('Maximum')
+            parser.add_argument('PopSize')
+            parser.add_argument('NumRuns')
+            parser.add_argument('NumGens')
+            parser.add_argument('CrossPoint')
+            parser.add_argument('PCross')
+            parser.add_argument('PMut')
+            parser.add_argument('RandomSeed')
+
+            args = parser.parse_args()
+
+            xLen = [int(i) for i in args.l]
+            if args.m is 't':
+                isMaxFitness = True
+            else:
+                isMaxFitness = False
+            selectionChoice = int(args.s)
+            crossChoice = int(args.x)
+            resultsPath = args.o
 
-        try:
-            minX = float(args.Minimum)
-            maxX = float(args.Maximum)
-            popSize = int(args.PopSize)
-            numRuns = int(args.NumRuns)
-            numGens = int(args.NumGens)
-            pointCross = int(args.CrossPoint)
-            probCross = float(args.PCross)
-            probMut = float(args.PMut)
-            rSeed = int(args.RandomSeed)
-        except ValueError:
-            print("Invalid values given, check usage statement")
-            sys.exit()
+            try:
+                minX = float(args.Minimum)
+                maxX = float(args.Maximum)
+                popSize = int(args.PopSize)
+                numRuns = int(args.NumRuns)
+                numGens = int(args.NumGens)
+                pointCross = int(args.CrossPoint)
+                probCross = float(args.PCross)
+                probMut = float(args.PMut)
+                rSeed = int(args.RandomSeed)
+                numWorkers = int(args.w)
+                tableMemory = int(args.t)
+                cacheSize = int(args.c)
+                pressure = float(args.p)
+            except ValueError:
+                print("Invalid values given, check usage statement")
+                sys.exit()
 
-except getopt.error as err:
-    print(str(err))
-    sys.exit()
+    except getopt.error as err:
+        print(str(err))
+        sys.exit()
 
-# If two arguments were passed, attempt to open file for reading input
-if fileName:
-    try:
-        file = open(fileName, "r")
-        boolCheck = [False] * 10
-        readLine = file.readlines()
-        # Read all lines from file and split by spaces
-        for li in readLine:
-            tok = li.split()
-            # Test markers for all lines. Expects all required arguments
-            # and will exit if not all are given. Some defaults.
-            if tok[0] == "BitLength:":
-                for i in range(len(tok) - 1):
-                    xLen.append(int(tok[i + 1]))
-                boolCheck[0] = True
+    # If two arguments were passed, attempt to open file for reading input
+    if fileName:
+        try:
+            file = open(fileName, "r")
+            boolCheck = [False] * 10
+            readLine = file.readlines()
+            # Read all lines from file and split by spaces
+            for li in readLine:
+                tok = li.split()
+                # Test markers for all lines. Expects all required arguments
+                # and will exit if not all are given. Some defaults.
+                if tok[0] == "BitLength:":
+                    for i in range(len(tok) - 1):
+                        xLen.append(int(tok[i + 1]))
+                    boolCheck[0] = True
                 
-            if tok[0] == "Min:":
-                minX = float(tok[1])
-                boolCheck[1] = True
+                if tok[0] == "Min:":
+                    minX = float(tok[1])
+                    boolCheck[1] = True
                 
-            if tok[0] == "Max:":
-                maxX = float(tok[1])
-                boolCheck[2] = True
+                if tok[0] == "Max:":
+                    maxX = float(tok[1])
+                    boolCheck[2] = True
                 
-            if tok[0] == "Pop:":
-                popSize = int(tok[1])
-                boolCheck[3] = True
+                if tok[0] == "Pop:":
+                    popSize = int(tok[1])
+                    boolCheck[3] = True
                 
-            if tok[0] == "Runs:":
-                numRuns = int(tok[1])
-                boolCheck[4] = True
+                if tok[0] == "Runs:":
+                    numRuns = int(tok[1])
+                    boolCheck[4] = True
                 
-            if tok[0] == "Gens:":
-                numGens = int(tok[1])
-                boolCheck[5] = True
+                if tok[0] == "Gens:":
+                    numGens = int(tok[1])
+                    boolCheck[5] = True
                 
-            if tok[0] == "CrossPoint:":
-                pointCross = int(tok[1])
-                boolCheck[6] = True
+                if tok[0] == "CrossPoint:":
+                    pointCross = int(tok[1])
+                    boolCheck[6] = True
                 
-            if tok[0] == "P_Cross:":
-                probCross = float(tok[1])
-                boolCheck[7] = True
+                if tok[0] == "P_Cross:":
+                    probCross = float(tok[1])
+                    boolCheck[7] = True
                 
-            if tok[0] == "P_Mut:":
-                probMut = float(tok[1])
-                boolCheck[8] = True
+                if tok[0] == "P_Mut:":
+                    probMut = float(tok[1])
+                    boolCheck[8] = True
                 
-            if tok[0] == "RandomSeed:":
-                rSeed = int(tok[1])
-                boolCheck[9] = True
+                if tok[0] == "RandomSeed:":
+                    rSeed = int(tok[1])
+                    boolCheck[9] = True
                 
-            if tok[0] == "Selection:":
-                selectionChoice = int(tok[1])
-                if selectionChoice < 0 and selectionChoice > 2:
-                    selectionChoice = 0
+                if tok[0] == "Selection:":
+                    selectionChoice = int(tok[1])
+                    if selectionChoice < 0 or selectionChoice > 3:
+                        selectionChoice = 0
                     
-            if tok[0] == "MaxFitness:":
-                if tok[1] == "f":
-                    isMaxFitness = False
-                else:
-                    isMaxFitness = True
+                if tok[0] == "MaxFitness:":
+                    if tok[1] == "f":
+                        isMaxFitness = False
+                    else:
+                        isMaxFitness = True
 
-        # Exit if not all required arguments were given
-        for check in boolCheck:
-            if check is False:
-                print("Missing a parameter in the file.")
-                sys.exit()
-             
-    except IOError:
-        print("Unable to open file.")
-        sys.exit()
-    except ValueError:
-        print("Error accepting value, check them.")
-        sys.exit()
+                if tok[0] == "Workers:":
+                    numWorkers = int(tok[1])
 
-# If the user chose manual input, go here. Allow
-if manInput:
-    choice = 0
-    # Loop until user gives one of two choices
-    while not (choice == "y" or choice == "n"):
-        choice = input("Would you like to use default values? (y/n): ")
-
-    # Accept default values used for the assignment
-    if choice == "y":
-        xLen = [10, 15, 20]
-        minX = -1.0
-        maxX = 5.0
-        popSize = 30
-        isMaxFitness = False
-        pointCross = 25
-        probCross = .8
-        probMut = .1
-        numRuns = 30
-        numGens = 50
-        selectionChoice = 0
-        rSeed = 15
-        print()
-
-    # Allow user input for all variables
-    else:
-        badInput = True
-        while badInput:
-            try:
-                minX = float(input("Please enter the minimum value for the problem: "))
-                badInput = False
-            except:
-                pass
-            
-        badInput = True
-        while badInput:
-            try:
-                maxX = float(input("Please enter the maximum value for the problem: "))
-                if maxX > minX:
-                    badInput = False
-                else:
-                    print("  Enter a value larger than {}.".format(minX))
-            except:
-                pass
+                if tok[0] == "TableMemory:":
+                    tableMemory = int(tok[1])
 
-        badInput = True
-        while badInput:
-            try:
-                addVal = int(input("Please enter a bitstring size (at least once). Enter 0 to end: "))
-                if addVal > 0:
-                    xLen.append(addVal)
-                elif addVal is 0 and len(xLen) > 0:
-                    badInput = False
-                elif addVal < 0:
-                    badInput = True
-            except:
-                pass
-
-        badInput = True
-        while badInput:
-            try:
-                popSize = int(input("Please enter a population size (>0): "))
-                if popSize > 0:
-                    badInput = False
-            except:
-                pass
+                if tok[0] == "CacheSize:":
+                    cacheSize = int(tok[1])
 
-        badInput = True
-        while badInput:
-            try:
-                isMax = input("Is a larger fitness value preferred? (t/f): ")
-                if isMax is "t":
-                    isMaxFitness = True
-                    badInput = False
-                elif isMax is "f":
-                    isMaxFitness = False
-                    badInput = False
-            except:
-                pass
+                if tok[0] == "Pressure:":
+                    pressure = float(tok[1])
 
-        badInput = True
-        while badInput:
-            try:
-                print("Which selection method do you prefer?")
-                print("  Proportional, Tournament, or Linear Ranking?")
-                selectionChoice = int(input("    (0, 1, 2): "))
-                if selectionChoice in [0, 1, 2]:
-                    badInput = False
-            except:
-                pass
+                if tok[0] == "Results:":
+                    resultsPath = tok[1]
 
-        badInput = True
-        while badInput:
-            try:
-                print("Where would you like the crossover point?")
-                crossPoint = int(input("  (Integer from 1 - {}): ".format(sum(xLen))))
-                if crossPoint > 0 and crossPoint < sum(xLen):
-                    badInput = False
-            except:
-                pass
+                if tok[0] == "Crossover:":
+                    crossChoice = int(tok[1])
+                    if crossChoice < 0 or crossChoice > 2:
+                        crossChoice = 0
 
-        badInput = True
-        while badInput:
-            try:
-                numGens = int(input("How many generations would you like to use? "))
-                if numGens > 0:
-                    badInput = False
-            except:
-                pass
-
-        badInput = True
-        while badInput:
-            try:
-                numRuns = int(input("How many runs would you like to use? "))
-                if numRuns > 0:
-                    badInput = False
-            except:
-                pass
-
-        badInput = True
-        while badInput:
-            try:
-                probCross = float(input("What is the probability of crossover? (0-1): "))
-                if probCross >= 0 and probCross <= 1:
-                    badInput = False
-            except:
-                pass
-
-        badInput = True
-        while badInput:
-            try:
-                probMut = float(input("What is the probability of mutation? (0-1): "))
-                if probMut >= 0 and probMut <= 1:
-                    badInput = False
-            except:
-                pass
+            # Exit if not all required arguments were given
+            for check in boolCheck:
+                if check is False:
+                    print("Missing a parameter in the file.")
+                    sys.exit()
+             
+        except IOError:
+            print("Unable to open file.")
+            sys.exit()
+        except ValueError:
+            print("Error accepting value, check them.")
+            sys.exit()
 
-        badInput = True
-        while badInput:
-            try:
-                rSeed = int(input("What initial random seed do you want? (Integer 0 - 999): "))
-                if rSeed >= 0 and rSeed <= 999:
+    # If the user chose manual input, go here. Allow
+    if manInput:
+        choice = 0
+        # Loop until user gives one of two choices
+        while not (choice == "y" or choice == "n"):
+            choice = input("Would you like to use default values? (y/n): ")
+
+        # Accept default values used for the assignment
+        if choice == "y":
+            xLen = [10, 15, 20]
+            minX = -1.0
+            maxX = 5.0
+            popSize = 30
+            isMaxFitness = False
+            pointCross = 25
+            probCross = .8
+            probMut = .1
+            numRuns = 30
+            numGens = 50
+            selectionChoice = 0
+            rSeed = 15
+            print()
+
+        # Allow user input for all variables
+        else:
+            badInput = True
+            while badInput:
+                try:
+                    minX = float(input("Please enter the minimum value for the problem: "))
                     badInput = False
-            except:
-                pass
-        print()
+                except:
+                    pass
+            
+            badInput = True
+            while badInput:
+                try:
+                    maxX = float(input("Please enter the maximum value for the problem: "))
+                    if maxX > minX:
+                        badInput = False
+                    else:
+                        print("  Enter a value larger than {}.".format(minX))
+                except:
+                    pass
+
+            badInput = True
+            while badInput:
+                try:
+                    addVal = int(input("Please enter a bitstring size (at least once). Enter 0 to end: "))
+                    if addVal > 0:
+                        xLen.append(addVal)
+                    elif addVal is 0 and len(xLen) > 0:
+                        badInput = False
+                    elif addVal < 0:
+                        badInput = True
+                except:
+                    pass
+
+            badInput = True
+            while badInput:
+                try:
+                    popSize = int(input("Please enter a population size (>0): "))
+                    if popSize > 0:
+                        badInput = False
+                except:
+                    pass
+
+            badInput = True
+            while badInput:
+                try:
+                    isMax = input("Is a larger fitness value preferred? (t/f): ")
+                    if isMax is "t":
+                        isMaxFitness = True
+                        badInput = False
+                    elif isMax is "f":
+                        isMaxFitness = False
+                        badInput = False
+                except:
+                    pass
+
+            badInput = True
+            while badInput:
+                try:
+                    print("Which selection method do you prefer?")
+                    print("  Proportional, Tournament, Linear Ranking, or Universal Sampling?")
+                    selectionChoice = int(input("    (0, 1, 2, 3): "))
+                    if selectionChoice in [0, 1, 2, 3]:
+                        badInput = False
+                except:
+                    pass
+
+            badInput = True
+            while badInput:
+                try:
+                    print("Where would you like the crossover point?")
+                    crossPoint = int(input("  (Integer from 1 - {}): ".format(sum(xLen))))
+                    if crossPoint > 0 and crossPoint < sum(xLen):
+                        badInput = False
+                except:
+                    pass
+
+            badInput = True
+            while badInput:
+                try:
+                    numGens = int(input("How many generations would you like to use? "))
+                    if numGens > 0:
+                        badInput = False
+                except:
+                    pass
+
+            badInput = True
+            while badInput:
+                try:
+                    numRuns = int(input("How many runs would you like to use? "))
+                    if numRuns > 0:
+                        badInput = False
+                except:
+                    pass
+
+            badInput = True
+            while badInput:
+                try:
+                    probCross = float(input("What is the probability of crossover? (0-1): "))
+                    if probCross >= 0 and probCross <= 1:
+                        badInput = False
+                except:
+                    pass
+
+            badInput = True
+            while badInput:
+                try:
+                    probMut = float(input("What is the probability of mutation? (0-1): "))
+                    if probMut >= 0 and probMut <= 1:
+                        badInput = False
+                except:
+                    pass
+
+            badInput = True
+            while badInput:
+                try:
+                    rSeed = int(input("What initial random seed do you want? (Integer 0 - 999): "))
+                    if rSeed >= 0 and rSeed <= 999:
+                        badInput = False
+                except:
+                    pass
+            print()
                     
-# Error out for invalid values from file or command line arguments  
-else:
-    if len(xLen) is 0:
-        print("No bitstrings are provided.")
-        sys.exit()
+    # Error out for invalid values from file or command line arguments  
+    else:
+        if len(xLen) is 0:
+            print("No bitstrings are provided.")
+            sys.exit()
                 
-    if pointCross <= 0 or pointCross >= sum(xLen):
-        print("Crossover point must be between 0 and full bit length.")
-        sys.exit()
+        if pointCross <= 0 or pointCross >= sum(xLen):
+            print("Crossover point must be between 0 and full bit length.")
+            sys.exit()
 
-    if probCross < 0 or probCross > 1 or probMut < 0 or probMut > 1:
-        print("Probabilities must be between 0 and 1.")
-        sys.exit()
+        if probCross < 0 or probCross > 1 or probMut < 0 or probMut > 1:
+            print("Probabilities must be between 0 and 1.")
+            sys.exit()
 
-    if maxX <= minX:
-        print("The maximum value given is below the minimum.")
-        sys.exit()
+        if maxX <= minX:
+            print("The maximum value given is below the minimum.")
+            sys.exit()
 
-    if numRuns < 1 or numGens < 1:
-        print("The number of runs and generations must be a positive integer.")
-        sys.exit()
+        if pressure < 1 or pressure > 2:
+            print("Selection pressure must be between 1 and 2.")
+            sys.exit()
+
+        if numRuns < 1 or numGens < 1:
+            print("The number of runs and generations must be a positive integer.")
+            sys.exit()
 
-# Genereate a consistent block of random seeds to cover all runs
-random.seed(rSeed)
-seeds = []
-for i in range(numRuns):
-    seeds.append(random.randint(1, 999))
-
-# Initialize all runs for given values and print out results
-runs = RunCollection(numRuns, xLen)
-for i in range(runs.getMaxRuns()):
-    random.seed(seeds[i])
-    singleRun(runs.addAndUseRun(numGens, seeds[i], False), numGens, xLen, pointCross, probCross,
-              probMut, minX, maxX, selectionChoice)
-runs.print()
+    # Genereate a consistent block of random seeds to cover all runs
+    random.seed(rSeed)
+    seeds = []
+    for i in range(numRuns):
+        seeds.append(random.randint(1, 999))
+
+    # Initialize all runs for given values and print out results
+    runs = RunCollection(numRuns, xLen, resultsPath)
+    runs.generateRuns(seeds, numGens, pointCross, probCross, probMut, minX, maxX,
+                      selectionChoice, False, numWorkers, tableMemory, cacheSize, pressure,
+                      crossChoice)
+    runs.print()
@@ -38,13 +38,37 @@
 # listing the total value, penalty score (0 is best, followed by negative
 # values near 0, with positives failing), and the actual bit string
 # were included to help with debugging.
+#
+# Run with -b to benchmark instead, optionally followed by instance sizes
+# (python knapsack.py -b 20 50 100). Each size gets one normal instance,
+# solved exactly and by the GA, and the GA's average gap to the optimum is
+# printed next to the time each took.
+#
+# With -f FILE, the normal instance is loaded from FILE if it exists, or
+# generated and saved there if not, so the same instance can be reused.
+#
+# With -r (or repair set below), bitstrings over the weight cap are repaired
+# by greedily dropping the items with the lowest value to weight ratio
+# until they fit, instead of being kept and penalized.
+#
+# With -w N, every run of every instance is a separate job spread over N
+# processes. Each instance is printed once all of its runs are done, so
+# instances may print out of order, but with the same results. Each worker
+# keeps its own cache, so printed cache counts only cover this process.
 #########################################
 
-import random
+import random, math, time, argparse, sys, os, struct, mmap
+from array import array
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pprint import pprint as pp
-from copy import deepcopy
 from collections import OrderedDict as od
 
+# NumPy is only needed to evaluate whole generations at once
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
 ###
 # Stores a dictionary of runs labeled by run number
 # Will print data from all runs at once
@@ -53,9 +77,13 @@ class RunCollection:
     ###
     # Initialize with the number of runs, issuing a warning if the number is exceeded
     # Sets up a dictionary to store individual run data
+    # crossChoice picks the crossover and repair turns on greedy repair for
+    # every run, see SingleRun
+    # Runs are generated right away unless generate is False, in which case
+    # they are added later with addRun, see runConcurrent
     ###
     def __init__(self, maxRuns, knapsack, numGens, bitLength, popSize, pointCross, probCross,
-                 probMut, randomSeeds):
+                 probMut, randomSeeds, crossChoice = 0, repair = False, generate = True):
         self.maxRuns = maxRuns
         self.numGens = numGens
         self.bitLength = bitLength
@@ -64,40 +92,123 @@ class RunCollection:
         self.probCross = probCross
         self.probMut = probMut
         self.randomSeeds = randomSeeds
+        self.crossChoice = crossChoice
+        self.repair = repair
         self.allRunData = od()
-        self._generateRuns(knapsack)
+        if generate:
+            self._generateRuns(knapsack)
 
     ###
     # Fill ordered dictionary with each run
     ###
     def _generateRuns(self, knapsack):
         for i in range(self.maxRuns):
-            newRun = SingleRun(knapsack, self.numGens, self.bitLength, self.populationSize,
-                               self.pointCross, self.probCross, self.probMut, self.randomSeeds[i])
-            self.allRunData['Run ' + str(i + 1)] = newRun
+            self.allRunData['Run ' + str(i + 1)] = self._newRun(knapsack, i)
+
+    ###
+    # Does run number runIndex (from 0) with this collection's settings and its seed
+    ###
+    def _newRun(self, knapsack, runIndex):
+        return SingleRun(knapsack, *self._runSettings(runIndex)).run()
+
+    ###
+    # SingleRun arguments after the knapsack for run number runIndex (from 0)
+    # Worker jobs carry these rather than the collection, which the parent
+    # keeps filling while jobs are still being sent, see runConcurrent
+    ###
+    def _runSettings(self, runIndex):
+        return (self.numGens, self.bitLength, self.populationSize, self.pointCross,
+                self.probCross, self.probMut, self.randomSeeds[runIndex], self.crossChoice,
+                self.repair)
+
+    ###
+    # Stores a run finished elsewhere, such as in a worker process
+    # Runs may arrive in any order. Returns True once every run is in, with
+    # the dictionary put back in run order.
+    ###
+    def addRun(self, runIndex, newRun):
+        self.allRunData['Run ' + str(runIndex + 1)] = newRun
+        if len(self.allRunData) < self.maxRuns:
+            return False
+        self.allRunData = od(('Run ' + str(i + 1), self.allRunData['Run ' + str(i + 1)])
+                             for i in range(self.maxRuns))
+        return True
 
 ###
 # Stores data from a single GA run
 # Initializes with the number of generations to run, stores the random seed,
 # and if we want to min or max the fitness values
+# crossChoice picks one point (0), two point (1), or uniform (2) crossover
+# With repair, chromosomes over capacity are repaired as they are evaluated
+#
+# Nothing runs in the constructor. Each run owns its random generator, so
+# runs can be stepped a generation at a time with step or iterGenerations,
+# interleaved with other runs, or stopped early. run does every generation.
 ###
 class SingleRun:
-    def __init__(self, knapsack, numGens, bitLength, popSize, pointCross, probCross, probMut, randomSeed):
+    def __init__(self, knapsack, numGens, bitLength, popSize, pointCross, probCross, probMut, randomSeed,
+                 crossChoice = 0, repair = False):
         self.numGens = numGens
         self.bitLength = bitLength
         self.populationSize = popSize
         self.pointCross = bitLength - pointCross
         self.probCross = probCross
         self.probMut = probMut
-        random.seed(randomSeed)
+        self.crossChoice = crossChoice
+        self.repair = repair
+        self.knapsack = knapsack
+        self.random = random.Random(randomSeed)
         self.bestOfRun = {'Best Value' : None, 'Best Penalty' : None, 'Best BitString' : None}
         self.genResults = od()
-        self._initialGen()
-        self._addBestOfRun(knapsack)
-        if self.pointCross <= 0 or self.pointCross >= self.bitLength:
-            print("WARNING: crossover point is not within the bit string.")
-            print("    The crossover process will have no actual impact.")
-        self._generateNewGen(knapsack)
+        # Generations done so far, None until the initial generation exists
+        self.currentGen = None
+
+    ###
+    # Leaves the knapsack out when pickled
+    # Runs done in a worker process are sent back whole, and the worker
+    # already holds the instance, so only the results are copied. A run
+    # unpickled this way can no longer be stepped.
+    ###
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['knapsack'] = None
+        return state
+
+    ###
+    # Advances the run by one generation
+    # The first step creates the initial generation. Returns False, without
+    # doing anything, once all generations are done.
+    ###
+    def step(self):
+        if self.currentGen is None:
+            self._initialGen()
+            self._addBestOfRun(self.knapsack)
+            if self.crossChoice == 0 and (self.pointCross <= 0 or self.pointCross >= self.bitLength):
+                print("WARNING: crossover point is not within the bit string.")
+                print("    The crossover process will have no actual impact.")
+            self.currentGen = 0
+            return True
+        if self.currentGen >= self.numGens:
+            return False
+        self._newGen(self.knapsack)
+        self.currentGen += 1
+        return True
+
+    ###
+    # Generator stepping through the rest of the run
+    # Yields the number of the generation just done, 0 for the initial one.
+    ###
+    def iterGenerations(self):
+        while self.step():
+            yield self.currentGen
+
+    ###
+    # Does every remaining generation. Returns the run itself.
+    ###
+    def run(self):
+        while self.step():
+            pass
+        return self
 
     ###
     # Creates the initial generation for the GA
@@ -111,24 +222,95 @@ class SingleRun:
             # Randomly flags bits in length of chromosome
             while tempSize > 0:
                 tempSize = tempSize - 1
-                if random.random() < .5:
+                if self.random.random() < .5:
                     initial = initial | 1<<tempSize
             self.generation.append(initial)
+        self._invalidateAll()
+
+    ###
+    # Evaluations are stored next to each chromosome in three lists, with None
+    # marking an individual that has never been evaluated. genChanges holds a
+    # mask of the bits flipped in each chromosome since its last evaluation.
+    ###
+    def _invalidateAll(self):
+        self.genWeights = [None] * len(self.generation)
+        self.genValues = [None] * len(self.generation)
+        self.genPenalties = [None] * len(self.generation)
+        self.genChanges = [0] * len(self.generation)
+
+    ###
+    # Flips the bits under a mask in one chromosome and records them as changed
+    ###
+    def _changeIndividual(self, index, mask):
+        self.generation[index] ^= mask
+        self.genChanges[index] ^= mask
+
+    ###
+    # Brings the stored weight, value, and penalty of changed chromosomes up to date
+    # When only a few bits changed, the stored totals are adjusted by the flipped
+    # items alone. Chromosomes never evaluated, or with too many changes for that
+    # to pay off, are evaluated in full together. Unchanged individuals keep their
+    # results from earlier generations.
+    ###
+    def _evaluateGen(self, knapsack):
+        stale = []
+        deltaLimit = max(1, knapsack.size // 8)
+        for i, weight in enumerate(self.genWeights):
+            change = self.genChanges[i]
+            self.genChanges[i] = 0
+            if weight is None or bin(change).count('1') > deltaLimit:
+                stale.append(i)
+            elif change:
+                weight, value = knapsack.deltaTotals(self.generation[i], change,
+                                                     weight, self.genValues[i])
+                self.genWeights[i] = weight
+                self.genValues[i] = value
+                self.genPenalties[i] = self._penalties(knapsack, [weight])[0]
+        if stale:
+            weights, values = knapsack.evaluateGeneration([self.generation[i] for i in stale])
+            penalties = self._penalties(knapsack, weights)
+            for n, i in enumerate(stale):
+                self.genWeights[i] = weights[n]
+                self.genValues[i] = values[n]
+                self.genPenalties[i] = penalties[n]
+        if self.repair:
+            self._repairGen(knapsack)
+
+    ###
+    # Greedy repair of every chromosome over capacity
+    # The knapsack drops its worst value to weight items from the chromosome
+    # until it fits, and the stored totals are updated as items are dropped.
+    ###
+    def _repairGen(self, knapsack):
+        for i, weight in enumerate(self.genWeights):
+            if weight > knapsack.capacity:
+                chromo, weight, value = knapsack.repair(self.generation[i], weight,
+                                                        self.genValues[i])
+                self.generation[i] = chromo
+                self.genWeights[i] = weight
+                self.genValues[i] = value
+                self.genPenalties[i] = self._penalties(knapsack, [weight])[0]
 
     ###
     # Selection process, binary tournament, for a new generation
+    # Tournaments only pick parent indices. Chromosomes are immutable ints, so
+    # the new generation is built once from references and nothing is copied.
+    # Stored evaluations follow their chromosomes into the new generation.
     ###
     def _selectNewGen(self, knapsack):
-        tempList = []
-        for i in range(popSize):
-            tour1 = random.randint(0, self.populationSize - 1)
-            tour2 = random.randint(0, self.populationSize - 1)
+        self._evaluateGen(knapsack)
+        values = self.genValues
+        penalties = self.genPenalties
+        picks = []
+        for i in range(self.populationSize):
+            tour1 = self.random.randint(0, self.populationSize - 1)
+            tour2 = self.random.randint(0, self.populationSize - 1)
             # Ensure that two different entries are selected
             while tour1 is tour2:
-                tour2 = random.randint(0, self.populationSize - 1)
+                tour2 = self.random.randint(0, self.populationSize - 1)
                 
-            pen1 = self._penalty(knapsack, self.generation[tour1])
-            pen2 = self._penalty(knapsack, self.generation[tour2])
+            pen1 = penalties[tour1]
+            pen2 = penalties[tour2]
 
             select = 0
             # If both are over capacity, take the lesser weight
@@ -145,104 +327,156 @@ class SingleRun:
                     select = tour2
             # If both are under capacity, take the higher value
             else:
-                fit1 = knapsack.getTotalValue(self.generation[tour1])
-                fit2 = knapsack.getTotalValue(self.generation[tour2])
+                fit1 = values[tour1]
+                fit2 = values[tour2]
                 if fit1 > fit2:
                     select = tour1
                 else:
                     select = tour2
-                    
-            tempList.append(deepcopy(self.generation[select]))
-        self.generation = tempList
+
+            picks.append(select)
+        self.generation[:] = [self.generation[select] for select in picks]
+        self.genWeights = [self.genWeights[select] for select in picks]
+        self.genValues = [values[select] for select in picks]
+        self.genPenalties = [penalties[select] for select in picks]
+        self.genChanges = [0] * len(picks)
+
+    ###
+    # Mask of the bits between two random cut points for two point crossover
+    # The low masks of the two points differ exactly between them. Equal points
+    # give an empty mask and leave the pair as it was. So does a string too
+    # short to have a cut point inside it.
+    ###
+    def _twoPointMask(self):
+        if self.bitLength < 2:
+            return 0
+        point1 = self.random.randint(1, self.bitLength - 1)
+        point2 = self.random.randint(1, self.bitLength - 1)
+        return ((1 << point1) - 1) ^ ((1 << point2) - 1)
 
     ###
     # Crossover process for a new generation
+    # Each pair swaps the bits under a mask: the low bits after the crossover point
+    # for one point, the bits between two random points for two point, or random
+    # bits for uniform. Bits that differ under the mask are found with one XOR and
+    # AND and flipped in both chromosomes, so a pair costs a few int operations.
     ###
     def _crossNewGen(self):
         # Ignore process if it would have no impact
-        if self.pointCross <= 0 or self.pointCross >= self.bitLength:
+        if self.crossChoice == 0 and (self.pointCross <= 0 or self.pointCross >= self.bitLength):
             return
-        
+        # Low mask covering every bit after the crossover point
+        lowMask = (1 << self.pointCross) - 1
+
         # Working with pairs, not including the last element if length is odd
         halfLength = int(self.populationSize / 2)
         for i in range(halfLength):
             # Skip crossover of points based on given probability
-            if random.random() < self.probCross:
+            if self.random.random() < self.probCross:
                 # Calculate indices of two elements to swap
                 firstVal = 2 * i
                 secondVal = firstVal + 1
-                # Swap bitstrings at crossover point
-                # Two variables used to avoid copying issues with list references
-                swap1 = self.generation[firstVal]
-                swap2 = self.generation[secondVal]
-                self.generation[secondVal] = int((self.generation[secondVal] / (2 ** self.pointCross)))<<self.pointCross
-                self.generation[firstVal] = int((self.generation[firstVal] / (2 ** self.pointCross)))<<self.pointCross
-                for j in range(self.pointCross + 1):
-                    self.generation[secondVal] = self.generation[secondVal] | (swap1 % (2 ** j))
-                    self.generation[firstVal] = self.generation[firstVal] | (swap2 % (2 ** j))
+                if self.crossChoice == 1:
+                    mask = self._twoPointMask()
+                elif self.crossChoice == 2:
+                    mask = self.random.getrandbits(self.bitLength)
+                else:
+                    mask = lowMask
+                # Swap bitstrings under the mask
+                swap = (self.generation[firstVal] ^ self.generation[secondVal]) & mask
+                if swap:
+                    self._changeIndividual(firstVal, swap)
+                    self._changeIndividual(secondVal, swap)
+
+    ###
+    # Builds a mask of the bits to flip in one chromosome
+    # Rather than a random draw for every bit, the gap to the next flipped bit is
+    # drawn from a geometric distribution, so there is one draw per flip. Each bit
+    # is still flipped independently with the mutation probability.
+    # logKeep is log(1 - probMut), worked out once per generation
+    ###
+    def _mutationMask(self, logKeep):
+        mask = 0
+        n = int(math.log(1.0 - self.random.random()) / logKeep)
+        while n < self.bitLength:
+            mask |= 1<<n
+            n += int(math.log(1.0 - self.random.random()) / logKeep) + 1
+        return mask
 
     ###
     # Mutation process for a new generation
+    # Flips the bits of each chromosome with a single XOR mask
     ###
     def _mutateNewGen(self):
-        for index, i in enumerate(self.generation):
-            for n in range(self.bitLength):
-                # Flip each bit based on random chance and given probability
-                if random.random() < self.probMut:
-                    i = i ^ 1<<n
-            # Assign mutated bit string to the list
-            self.generation[index] = i
+        if self.probMut <= 0:
+            return
+        # Every bit flips, no need to draw gaps
+        if self.probMut >= 1:
+            for index in range(len(self.generation)):
+                self._changeIndividual(index, (1 << self.bitLength) - 1)
+            return
+        # log1p keeps tiny probabilities from rounding to log(1.0) == 0
+        logKeep = math.log1p(-self.probMut)
+        for index in range(len(self.generation)):
+            # Assign mutated bit string to the list, recording the flipped bits
+            mask = self._mutationMask(logKeep)
+            if mask:
+                self._changeIndividual(index, mask)
 
     ###
     # Process a new generation using the previous one
     # Cycles through selection, crossover, and mutation
     # Manipulates list directly so no returns are needed
     ###
-    def _generateNewGen(self, knapsack):
-        for i in range(self.numGens):
-            self._selectNewGen(knapsack)
-            self._crossNewGen()
-            self._mutateNewGen()
-            self._addBestOfRun(knapsack)
+    def _newGen(self, knapsack):
+        self._selectNewGen(knapsack)
+        self._crossNewGen()
+        self._mutateNewGen()
+        self._addBestOfRun(knapsack)
 
     ###
     # Static, deviation dependant penalty approach
     # Positive values are over capacity
+    # Takes the total weights of a generation and returns all penalties in one pass
     ###
-    def _penalty(self, knapsack, chromo, constant = 0):
+    def _penalties(self, knapsack, weights, constant = 0):
         if constant is 0:
             constant = int(knapsack.size / 4)
-        return constant * (knapsack.getTotalWeight(chromo) - knapsack.capacity)
+        return [constant * (weight - knapsack.capacity) for weight in weights]
 
     ###
     # Gets the best bitstring of the run.
     ###
     def _addBestOfRun(self, knapsack):
+        self._evaluateGen(knapsack)
+        values = self.genValues
+        penalties = self.genPenalties
+
         # Set an initial value for best of run on first generation
         start = 0
         if self.bestOfRun['Best Penalty'] is None:
             start = 1
-            self.bestOfRun['Best Penalty'] = self._penalty(knapsack, self.generation[0])
+            self.bestOfRun['Best Penalty'] = penalties[0]
             self.bestOfRun['Best BitString'] = self.generation[0]
-            self.bestOfRun['Best Value'] = knapsack.getTotalValue(self.generation[0])
+            self.bestOfRun['Best Value'] = values[0]
 
         # Loop through all bitstrings in generation to check for best
         for i in range(start, self.populationSize):
             tempPen = self.bestOfRun['Best Penalty']
-            newPen = self._penalty(knapsack, self.generation[i])
+            newPen = penalties[i]
             
             # If the new string is over capacity, only accept if the
             # old one had a worse penalty
             if newPen > 0 and tempPen > newPen:
                 self.bestOfRun['Best Penalty'] = newPen
                 self.bestOfRun['Best BitString'] = self.generation[i]
-                self.bestOfRun['Best Value'] = knapsack.getTotalValue(self.generation[i])
+                self.bestOfRun['Best Value'] = values[i]
 
             # If the new string is under capacity, compare value to the current best
             # Accept the new one if its value is higher
             elif newPen <= 0:
                 tempVal = self.bestOfRun['Best Value']
-                newVal = knapsack.getTotalValue(self.generation[i])
+                newVal = values[i]
                 if tempVal < newVal:
                     self.bestOfRun['Best Penalty'] = newPen
                     self.bestOfRun['Best BitString'] = self.generation[i]
@@ -254,19 +488,88 @@ class SingleRun:
     def getBestOfRun(self):
         return self.bestOfRun
 
+###
+# Bounded cache of evaluations keyed on the chromosome
+# Chromosomes are ints, so they can be used as keys directly. The least recently
+# used entry is dropped once capacity is reached. Hits and misses are counted
+# to show how many evaluations were saved.
+###
+class FitnessCache:
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.hits = 0
+        self.misses = 0
+        self.entries = od()
+
+    ###
+    # Returns the stored evaluation, or None if the chromosome is not cached
+    ###
+    def get(self, chromo):
+        result = self.entries.get(chromo)
+        if result is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self.entries.move_to_end(chromo)
+        return result
+
+    ###
+    # Stores an evaluation, dropping the least recently used entry if full
+    ###
+    def put(self, chromo, result):
+        self.entries[chromo] = result
+        if len(self.entries) > self.capacity:
+            self.entries.popitem(last = False)
+
+###
+# Adds amount to every total selected by plane, for bit sliced evaluation
+# planes[b] holds bit b of every total, one total per bit position. Bit b of the
+# addend is the plane itself where amount has bit b set, and 0 elsewhere. The
+# carry ripples up through higher planes, adding new ones as totals grow.
+###
+def _addToPlanes(planes, plane, amount):
+    carry = 0
+    b = 0
+    while amount or carry:
+        if b == len(planes):
+            planes.append(0)
+        addend = plane if amount & 1 else 0
+        total = planes[b]
+        planes[b] = total ^ addend ^ carry
+        carry = (total & addend) | (carry & (total ^ addend))
+        amount >>= 1
+        b += 1
+
+###
+# Transposes bit planes back into a list of count totals
+###
+def _planesToTotals(planes, count):
+    if not planes:
+        return [0] * count
+    # Highest plane first, so each column reads as a binary number
+    rows = [format(plane, '0{}b'.format(count)) for plane in reversed(planes)]
+    totals = [int(''.join(column), 2) for column in zip(*rows)]
+    totals.reverse()
+    return totals
+
 ###
 # Stores values and weights for a knapsack of given size
 # Each value and weight is associated with a specific index
 # Includes options for special or trivial cases
 #   Special = 1: weights are the minimum so all may be included
 #   Special = 2: weights are made large enough none may be included
+# With cacheSize above 0, total weights and values are kept in a FitnessCache
+# shared by every run on this knapsack.
+# Instances can be written to a binary file with save and read back with load.
 ###
 class knapsack:
-    def __init__(self, size, capacity, special = 0):
-        self.size = size
-        self.values = []
-        self.weights = []
-        self.capacity = capacity
+    # Binary file header: magic, format version, size, capacity (little endian)
+    fileHeader = struct.Struct('<4sIqq')
+    fileMagic = b'KNAP'
+    fileVersion = 1
+
+    def __init__(self, size, capacity, special = 0, cacheSize = 0):
+        self._setup(size, capacity, cacheSize)
 
         # If special is set, for 1 give small trivial weights. For 2 give
         # large trivial weights. Small weights should allow sum to less than
@@ -289,51 +592,456 @@ class knapsack:
             # Sum of weights must be at least twice the capacity
             tpWeight = int(capacity * 2)
             self.weights = [(random.randint(1, smWeight)) for i in range(size)]
+            # Running sum of the weights, kept up to date with every change
+            # instead of summing the whole list on each step
+            total = sum(self.weights)
 
             # If the sum of weights is less than twice the capacity, increment
             # them unless if it would place them over the smaller limit used.
             # This attempts to keep weights spread and the number of elements in
             # the best solution closer to half of them.
-            while sum(self.weights) < tpWeight - 1:
+            while total < tpWeight - 1:
                 index = random.randint(0, size - 1)
                 if self.weights[index] < smWeight:
                     self.weights[index] += 1
+                    total += 1
 
             # Add a check to modify weights that go well over the limit
             # Randomly decrement weights that are greater than 1 to
             # lower weights back to twice the capacity.
-            while sum(self.weights) > tpWeight + 1:
+            while total > tpWeight + 1:
                 index = random.randint(0, size - 1)
                 if self.weights[index] > 1:
                     self.weights[index] -= 1
+                    total -= 1
+
+    ###
+    # Sets the size, capacity, and cache, with empty weights and values
+    # Shared by the constructor and load.
+    ###
+    def _setup(self, size, capacity, cacheSize):
+        self.size = size
+        self.values = []
+        self.weights = []
+        self.capacity = capacity
+        self.cache = None
+        if cacheSize > 0:
+            self.cache = FitnessCache(cacheSize)
+        # Weight and value arrays for evaluateGeneration, made on first use
+        self.weightArray = None
+        self.valueArray = None
+        # Items by value to weight ratio for repair, made on first use
+        self.ratioOrder = None
+        # Byte lookup tables for getTotals, made on first use
+        self.weightTable = None
+        self.valueTable = None
+
+    ###
+    # Pickled state for worker processes
+    # Memoryviews into a mapped file cannot be pickled, so they are copied into
+    # arrays. Tables made on first use are left for each process to rebuild.
+    ###
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        if isinstance(self.weights, memoryview):
+            state['weights'] = array('q', self.weights)
+            state['values'] = array('q', self.values)
+        for name in ('weightArray', 'valueArray', 'ratioOrder', 'weightTable', 'valueTable'):
+            state[name] = None
+        return state
+
+    ###
+    # Writes the knapsack to a binary file
+    # A fixed header is followed by the weights and then the values, each
+    # packed as little endian 64 bit integers.
+    ###
+    def save(self, path):
+        weights = array('q', self.weights)
+        values = array('q', self.values)
+        if sys.byteorder == 'big':
+            weights.byteswap()
+            values.byteswap()
+        with open(path, 'wb') as f:
+            f.write(self.fileHeader.pack(self.fileMagic, self.fileVersion, self.size, self.capacity))
+            f.write(weights.tobytes())
+            f.write(values.tobytes())
+
+    ###
+    # Reads a knapsack written by save
+    # With useMmap, the file is memory mapped and the weights and values are
+    # memoryviews into it, so nothing is read until it is used. Otherwise they
+    # are read into arrays. Either way they index like the generated lists.
+    ###
+    @classmethod
+    def load(cls, path, cacheSize = 0, useMmap = False):
+        with open(path, 'rb') as f:
+            header = f.read(cls.fileHeader.size)
+            if len(header) < cls.fileHeader.size:
+                raise ValueError("{} is too short to be a knapsack file".format(path))
+            magic, version, size, capacity = cls.fileHeader.unpack(header)
+            if magic != cls.fileMagic or version != cls.fileVersion:
+                raise ValueError("{} is not a version {} knapsack file".format(path, cls.fileVersion))
+            start = cls.fileHeader.size
+            end = start + 16 * size
+            if os.fstat(f.fileno()).st_size < end:
+                raise ValueError("{} is missing weights or values".format(path))
+
+            knap = cls.__new__(cls)
+            knap._setup(size, capacity, cacheSize)
+            # Memoryviews use the native byte order, so only map on little endian
+            if useMmap and sys.byteorder == 'little':
+                data = memoryview(mmap.mmap(f.fileno(), 0, access = mmap.ACCESS_READ))
+                knap.weights = data[start:start + 8 * size].cast('q')
+                knap.values = data[start + 8 * size:end].cast('q')
+            else:
+                knap.weights = array('q')
+                knap.weights.fromfile(f, size)
+                knap.values = array('q')
+                knap.values.fromfile(f, size)
+                if sys.byteorder == 'big':
+                    knap.weights.byteswap()
+                    knap.values.byteswap()
+        return knap
+
+    ###
+    # Builds the byte lookup tables used by getTotals
+    # The chromosome is split into bytes from the lowest bit up, so byte k holds
+    # the 8 elements ending 8 * k from the end of the knapsack. Each byte has 256
+    # entries of the total weight or value for that pattern of bits, and the
+    # tables for all bytes are stored one after another in a flat array.
+    # Each entry is the entry without its lowest bit, plus that bit's element.
+    ###
+    def _buildTables(self):
+        self.tableBytes = (self.size + 7) // 8
+        self.weightTable = array('q', bytes(8 * 256 * self.tableBytes))
+        self.valueTable = array('q', bytes(8 * 256 * self.tableBytes))
+        for k in range(self.tableBytes):
+            offset = 256 * k
+            for pattern in range(1, 256):
+                low = pattern & -pattern
+                index = self.size - 8 * k - low.bit_length()
+                weight = self.weightTable[offset + (pattern ^ low)]
+                value = self.valueTable[offset + (pattern ^ low)]
+                if index >= 0:
+                    weight += self.weights[index]
+                    value += self.values[index]
+                self.weightTable[offset + pattern] = weight
+                self.valueTable[offset + pattern] = value
+
+    ###
+    # Get the combined weight and value of all elements currently included in
+    # the knapsack from a chromosome (set to 1, not 0) as (weight, value).
+    # Checks the cache first, if there is one. Otherwise adds one entry from
+    # the byte lookup tables for every 8 elements.
+    ###
+    def getTotals(self, chromo):
+        if self.cache is not None:
+            totals = self.cache.get(chromo)
+            if totals is not None:
+                return totals
+        if self.weightTable is None:
+            self._buildTables()
+        weightTable = self.weightTable
+        valueTable = self.valueTable
+        weight = 0
+        value = 0
+        offset = 0
+        for byte in chromo.to_bytes(self.tableBytes, 'little'):
+            weight += weightTable[offset + byte]
+            value += valueTable[offset + byte]
+            offset += 256
+        totals = (weight, value)
+        if self.cache is not None:
+            self.cache.put(chromo, totals)
+        return totals
+
+    ###
+    # Update the totals of a chromosome after the bits in change were flipped
+    # Only the flipped items are visited: each one now set in the chromosome is
+    # added, each one now clear is taken away. Returns (weight, value).
+    ###
+    def deltaTotals(self, chromo, change, weight, value):
+        while change:
+            low = change & -change
+            index = self.size - low.bit_length()
+            if chromo & low:
+                weight += self.weights[index]
+                value += self.values[index]
+            else:
+                weight -= self.weights[index]
+                value -= self.values[index]
+            change ^= low
+        return weight, value
+
+    ###
+    # Greedy repair of a chromosome over capacity, given its total weight and value
+    # Items are dropped in order of value to weight ratio, worst first, until
+    # the weight is within capacity. The order is sorted once per knapsack.
+    # Returns the repaired (chromosome, weight, value).
+    ###
+    def repair(self, chromo, weight, value):
+        if self.ratioOrder is None:
+            self.ratioOrder = sorted(range(self.size), key = lambda i: self.values[i] / self.weights[i])
+        for index in self.ratioOrder:
+            if weight <= self.capacity:
+                break
+            bit = 1 << (self.size - 1 - index)
+            if chromo & bit:
+                chromo ^= bit
+                weight -= self.weights[index]
+                value -= self.values[index]
+        return chromo, weight, value
 
     ###
     # Get the combined value of all elements currently included in the knapsack
     # from a chromosome (set to 1, not 0).
     ###
     def getTotalValue(self, chromo):
-        value = 0
-        breakPoint = self.size
-        for i in range(self.size):
-            breakPoint -= 1
-            temp = int(chromo / (2 ** breakPoint))
-            temp = temp % 2
-            value += temp * self.values[i]
-        return value
+        return self.getTotals(chromo)[1]
 
     ###
     # Get the combined weights of all elements currently included in the knapsack
     # from a chromosome (set to 1, not 0).
     ###
     def getTotalWeight(self, chromo):
-        value = 0
-        breakPoint = self.size
-        for i in range(self.size):
-            breakPoint -= 1
-            temp = int(chromo / (2 ** breakPoint))
-            temp = temp % 2
-            value += temp * self.weights[i]
-        return value
+        return self.getTotals(chromo)[0]
+
+    ###
+    # Get the total weights and values of a whole generation as two lists
+    # With the cache on, cached chromosomes are looked up first and only the
+    # rest are evaluated together, then stored. With NumPy they are evaluated
+    # as a matrix, without it bit sliced.
+    ###
+    def evaluateGeneration(self, generation):
+        if self.cache is None:
+            return self._evaluateMany(generation)
+
+        weights = [None] * len(generation)
+        values = [None] * len(generation)
+        missed = []
+        for i, chromo in enumerate(generation):
+            totals = self.cache.get(chromo)
+            if totals is None:
+                missed.append(i)
+            else:
+                weights[i], values[i] = totals
+        if missed:
+            newWeights, newValues = self._evaluateMany([generation[i] for i in missed])
+            for i, weight, value in zip(missed, newWeights, newValues):
+                weights[i] = weight
+                values[i] = value
+                self.cache.put(generation[i], (weight, value))
+        return weights, values
+
+    ###
+    # Get the total weights and values of many chromosomes, ignoring the cache
+    # With NumPy, they are unpacked into a (population x size) matrix of 0s
+    # and 1s, and all totals come from two matrix-vector products.
+    ###
+    def _evaluateMany(self, generation):
+        if np is None:
+            return self.evaluateBitSliced(generation)
+
+        if self.weightArray is None:
+            self.weightArray = np.array(self.weights, dtype = np.int64)
+            self.valueArray = np.array(self.values, dtype = np.int64)
+        # Pack every chromosome into whole bytes, highest bit first, then unpack
+        # them all at once. Padding bits sit in front of element 0.
+        numBytes = (self.size + 7) // 8
+        packed = b''.join(chromo.to_bytes(numBytes, 'big') for chromo in generation)
+        bits = np.unpackbits(np.frombuffer(packed, dtype = np.uint8))
+        bits = bits.reshape(len(generation), numBytes * 8)[:, numBytes * 8 - self.size:]
+        return (bits @ self.weightArray).tolist(), (bits @ self.valueArray).tolist()
+
+    ###
+    # Get the total weights and values of a whole generation without NumPy
+    # The generation is transposed into one bit plane per item: an int whose
+    # bit j is set if chromosome j includes the item. Totals for the whole
+    # generation are kept as bit planes too, and each item's weight and value
+    # are added to them with ripple carry adders over the planes. The cost
+    # depends on the number of items and the width of the totals, not on the
+    # population size. The planes are transposed back into lists at the end.
+    ###
+    def evaluateBitSliced(self, generation):
+        if not generation:
+            return [], []
+        # Reversed so that chromosome j lands on bit j of each plane
+        rows = [format(chromo, '0{}b'.format(self.size)) for chromo in reversed(generation)]
+        weightPlanes = []
+        valuePlanes = []
+        for i, column in enumerate(zip(*rows)):
+            plane = int(''.join(column), 2)
+            if plane:
+                _addToPlanes(weightPlanes, plane, self.weights[i])
+                _addToPlanes(valuePlanes, plane, self.values[i])
+        return (_planesToTotals(weightPlanes, len(generation)),
+                _planesToTotals(valuePlanes, len(generation)))
+
+    ###
+    # Get the best possible total value for the knapsack
+    # Used as a baseline to judge how close the GA gets. Capacities up to
+    # tableLimit are solved with a table indexed by capacity, larger ones by
+    # branch and bound.
+    ###
+    def solveExact(self, tableLimit = 10 ** 7):
+        if self.capacity <= tableLimit:
+            return self._solveTable()
+        return self._solveBranchBound()
+
+    ###
+    # Dynamic programming over capacity in O(capacity) memory
+    # best[c] is the highest value reachable with weight at most c. Each item
+    # updates the table from high capacities down, so it is counted once. With
+    # NumPy, each item is a single shifted maximum over the whole table.
+    ###
+    def _solveTable(self):
+        if np is not None:
+            best = np.zeros(self.capacity + 1, dtype = np.int64)
+            for weight, value in zip(self.weights, self.values):
+                if weight <= self.capacity:
+                    best[weight:] = np.maximum(best[weight:], best[:len(best) - weight] + value)
+            return int(best[-1])
+
+        best = [0] * (self.capacity + 1)
+        for weight, value in zip(self.weights, self.values):
+            for c in range(self.capacity, weight - 1, -1):
+                if best[c - weight] + value > best[c]:
+                    best[c] = best[c - weight] + value
+        return best[-1]
+
+    ###
+    # Depth first branch and bound, for capacities too large for the table
+    # Items are taken in order of value to weight ratio. A branch is dropped
+    # when filling its remaining room greedily, with a fraction of the first
+    # item that does not fit, cannot beat the best value found so far.
+    ###
+    def _solveBranchBound(self):
+        order = [i for i in range(self.size) if self.weights[i] <= self.capacity]
+        order.sort(key = lambda i: self.values[i] / self.weights[i], reverse = True)
+        weights = [self.weights[i] for i in order]
+        values = [self.values[i] for i in order]
+        count = len(order)
+
+        best = 0
+        # Each entry is the next item to decide on, weight used, and value so far
+        stack = [(0, 0, 0)]
+        while stack:
+            index, weight, value = stack.pop()
+            if value > best:
+                best = value
+            if index == count:
+                continue
+            room = self.capacity - weight
+            bound = value
+            n = index
+            while n < count and weights[n] <= room:
+                room -= weights[n]
+                bound += values[n]
+                n += 1
+            if n < count:
+                bound += values[n] * room / weights[n]
+            if bound <= best:
+                continue
+            # Push leaving the item out first, so taking it is explored first
+            stack.append((index + 1, weight, value))
+            if weights[index] <= self.capacity - weight:
+                stack.append((index + 1, weight + weights[index], value + values[index]))
+        return best
+
+# Knapsacks of the current worker process, set once by _initWorker
+_workerKnapsacks = None
+
+###
+# Pool initializer, so each worker receives the knapsacks once rather than
+# with every job
+###
+def _initWorker(knapsacks):
+    global _workerKnapsacks
+    _workerKnapsacks = knapsacks
+
+###
+# Does one run in a worker process
+# job is (instance index, run index, SingleRun arguments after the knapsack)
+###
+def _runWorker(job):
+    instance, runIndex, settings = job
+    return instance, runIndex, SingleRun(_workerKnapsacks[instance], *settings).run()
+
+###
+# Does every run of every instance as separate jobs over a process pool
+# collections are RunCollections made with generate set to False, one per
+# knapsack. Each finished run is added to its collection and yielded as
+# (instance index, run index, SingleRun) as soon as it is back, in the order
+# runs finish. Every run seeds itself, so results match running serially.
+###
+def runConcurrent(knapsacks, collections, numWorkers):
+    with ProcessPoolExecutor(numWorkers, initializer = _initWorker,
+                             initargs = (knapsacks,)) as pool:
+        futures = [pool.submit(_runWorker, (i, n, allRuns._runSettings(n)))
+                   for i, allRuns in enumerate(collections) for n in range(allRuns.maxRuns)]
+        for future in as_completed(futures):
+            instance, runIndex, newRun = future.result()
+            collections[instance].addRun(runIndex, newRun)
+            yield instance, runIndex, newRun
+
+###
+# Prints the summary of one instance
+###
+def printInstance(i, knap, allRuns):
+    print("Instance {}".format(i + 1))
+    print("  Weights: {}".format(list(knap.weights)))
+    print("  Values: {}".format(list(knap.values)))
+    print("  Capacity: {}".format(knap.capacity))
+    print("  Average of Best Runs: {}".format(averageBest(allRuns)))
+    if knap.cache is not None:
+        print("  Cache Hits: {}, Misses: {}".format(knap.cache.hits, knap.cache.misses))
+    print()
+
+    # Printing additional information for debugging
+##    for x, val in allRuns.allRunData.items():
+##        temp = val.getBestOfRun()
+##        print(temp['Best Value'])
+##        print(temp['Best Penalty'])
+##        print(format(temp['Best BitString'], '020b'))
+##    print()
+
+###
+# Average of the best value found by each run in a collection
+###
+def averageBest(allRuns):
+    avgVal = 0
+    for x, val in allRuns.allRunData.items():
+        avgVal += val.bestOfRun['Best Value']
+    return avgVal / allRuns.maxRuns
+
+###
+# Compares the GA against the exact solver on one normal instance per size
+# Capacity and the crossover point scale with size from the settings below.
+# Prints the optimum, the GA's average best of run, the gap between them as a
+# percent of the optimum, and the wall-clock seconds of each.
+###
+def benchmark(sizes):
+    print("{:>8} {:>10} {:>10} {:>8} {:>10} {:>10}".format(
+        'Size', 'Optimum', 'GA Avg', 'Gap %', 'GA Sec', 'Exact Sec'))
+    for size in sizes:
+        knap = knapsack(size, int(size * capacity / knapSize), 0, cacheSize)
+        sizeCross = max(1, int(size * pointCross / knapSize))
+
+        start = time.perf_counter()
+        allRuns = RunCollection(numRuns, knap, numGens, size, popSize, sizeCross, probCross,
+                                probMut, seeds, crossChoice, repair)
+        gaTime = time.perf_counter() - start
+        avgVal = averageBest(allRuns)
+
+        start = time.perf_counter()
+        optimum = knap.solveExact()
+        exactTime = time.perf_counter() - start
+
+        gap = 0.0
+        if optimum > 0:
+            gap = 100 * (optimum - avgVal) / optimum
+        print("{:>8} {:>10} {:>10.1f} {:>8.2f} {:>10.3f} {:>10.3f}".format(
+            size, optimum, avgVal, gap, gaTime, exactTime))
 
 # Set initial values for the problem
 knapSize = 20       # The number of elements (bits) in each chromosome (space in knapsack)
@@ -341,8 +1049,12 @@ popSize = 20        # The number of chromosomes in a generation
 capacity = 60       # The weight cap, or capacity, of the knapsack. Penalize anything higher.
 numGens = 50        # The number of generations each run will go through improving
 numRuns = 10        # The number of runs made of all those generations from random initial states
+cacheSize = 0       # Entries in the evaluation cache of each knapsack. 0 turns the cache off.
+numWorkers = 1      # Processes the runs are spread over. 1 does every run in this process.
 
 pointCross = 8      # Point in the bitstring where crossover happens. Between 0 and knapsize(not inclusive)
+crossChoice = 0     # Crossover method. 0 one point at pointCross, 1 two point, 2 uniform.
+repair = False      # Greedily drop low value to weight items from overweight bitstrings.
 probCross = .8      # Probability that crossover occurs with a pair.
 probMut = .05       # Probability that mutation happens on a bit.
 
@@ -352,27 +1064,50 @@ seeds = [ 30,  45, 101,   3, 923,
           76,  67, 323, 610, 400,
          156, 211, 349, 982, 820]
 
-# Do 3 instances. One normal, two special cases with trivial weights.
-for i in range(3):
-    knap = knapsack(knapSize, capacity, i)
-    allRuns = RunCollection(numRuns, knap, numGens, knapSize, popSize, pointCross, probCross,
-                            probMut, seeds)
-    avgVal = 0
-    for x, val in allRuns.allRunData.items():
-        avgVal += val.bestOfRun['Best Value']
-    avgVal /= numRuns
-    print("Instance {}".format(i + 1))
-    print("  Weights: {}".format(knap.weights))
-    print("  Values: {}".format(knap.values))
-    print("  Capacity: {}".format(capacity))
-    print("  Average of Best Runs: {}".format(avgVal))
-    print()
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description = 'GA for the knapsack problem')
+    parser.add_argument('-b', '--benchmark', nargs = '*', type = int,
+                        help = 'compare against the exact solver for these sizes')
+    parser.add_argument('-f', '--file',
+                        help = 'load the normal instance from this file, or save it there if missing')
+    parser.add_argument('-r', '--repair', action = 'store_true',
+                        help = 'repair bitstrings over capacity')
+    parser.add_argument('-w', '--workers', type = int, default = numWorkers,
+                        help = 'processes to spread the runs over')
+    args = parser.parse_args()
+    repair = repair or args.repair
+    numWorkers = args.workers
+    if args.benchmark is not None:
+        benchmark(args.benchmark or [20, 50, 100, 200, 500])
+        sys.exit()
 
-    # Printing additional information for debugging
-##    for x, val in allRuns.allRunData.items():
-##        temp = val.getBestOfRun()
-##        print(temp['Best Value'])
-##        print(temp['Best Penalty'])
-##        print(format(temp['Best BitString'], '020b'))
-##    print()
+    # Do 3 instances. One normal, two special cases with trivial weights.
+    knapsacks = []
+    for i in range(3):
+        if i == 0 and args.file is not None and os.path.exists(args.file):
+            knap = knapsack.load(args.file, cacheSize, True)
+        else:
+            knap = knapsack(knapSize, capacity, i, cacheSize)
+            if i == 0 and args.file is not None:
+                knap.save(args.file)
+        knapsacks.append(knap)
+
+    # Chromosomes cover every item of each instance. A loaded instance may
+    # have a different size, so the crossover point scales with it as in
+    # benchmark.
+    sizeCross = [max(1, int(knap.size * pointCross / knapSize)) for knap in knapsacks]
 
+    if numWorkers <= 1:
+        for i, knap in enumerate(knapsacks):
+            allRuns = RunCollection(numRuns, knap, numGens, knap.size, popSize, sizeCross[i], probCross,
+                                    probMut, seeds, crossChoice, repair)
+            printInstance(i, knap, allRuns)
+    # Every run of every instance is its own job. Each instance is printed as
+    # soon as its last run is back.
+    else:
+        collections = [RunCollection(numRuns, knap, numGens, knap.size, popSize, sizeCross[i],
+                                     probCross, probMut, seeds, crossChoice, repair, False)
+                       for i, knap in enumerate(knapsacks)]
+        for i, runIndex, newRun in runConcurrent(knapsacks, collections, numWorkers):
+            if len(collections[i].allRunData) == numRuns:
+                printInstance(i, knapsacks[i], collections[i])
@@ -18,11 +18,18 @@
 # multiple variations with one change while still being predictable.
 #####################################
 
-import random
+import random, asyncio
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from pprint import pprint as pp
 from copy import deepcopy
 from collections import OrderedDict as od
 
+# NumPy is only needed for the array engine, the list engine runs without it
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
 ###
 # Stores a dictionary of runs labeled by run number
 # Will print data from all runs at once
@@ -31,9 +38,13 @@ class RunCollection:
     ###
     # Initialize with the number of runs, issuing a warning if the number is exceeded
     # Sets up a dictionary to store individual run data
+    # useNumpy picks the array engine for every run, see SingleRun
+    # batched advances every run together as one array, see _generateBatched
+    # evaluator gets the fitness values of every run, see Evaluator
     ###
     def __init__(self, numRuns, numGens, popSize, chromeSize, minVal, maxVal,
-                 randomSeeds, isMaxFitness = True):
+                 randomSeeds, isMaxFitness = True, useNumpy = False, batched = False,
+                 evaluator = None):
         self.numRuns = numRuns
         self.numGens = numGens
         self.populationSize = popSize
@@ -42,8 +53,16 @@ class RunCollection:
         self.maxVal = maxVal
         self.isMaxFitness = isMaxFitness
         self.randomSeeds = randomSeeds
+        self.useNumpy = useNumpy
+        self.evaluator = evaluator
         self.allRunData = od()
-        self._generateRuns()
+        if batched and np is None:
+            print("WARNING: NumPy is not installed, runs will not be batched.")
+            batched = False
+        if batched:
+            self._generateBatched()
+        else:
+            self._generateRuns()
 
     ###
     # Fill ordered dictionary with each run
@@ -52,7 +71,88 @@ class RunCollection:
         for i in range(self.numRuns):
             self.allRunData[i] = SingleRun(self.numGens, self.populationSize,
                                            self.chromeSize, self.minVal, self.maxVal,
-                                           self.randomSeeds[i], self.isMaxFitness)
+                                           self.randomSeeds[i], self.isMaxFitness,
+                                           self.useNumpy, self.evaluator).run()
+        self._prepareData()
+
+    ###
+    # Fill ordered dictionary with each run, advancing all runs at once
+    # The populations of every run form one (runs x population x chromosome)
+    # array, so each generation of every run is a few array operations. Each
+    # run still draws its initial vectors and r1, r2 from its own seeded
+    # generator, so every run matches what it would be on its own. The
+    # finished generations and best of runs are stored back in the SingleRuns.
+    ###
+    def _generateBatched(self):
+        # Every run shares one evaluator, which also evaluates the batch
+        evaluator = self.evaluator
+        if evaluator is None:
+            evaluator = Evaluator()
+        runs = [SingleRun(self.numGens, self.populationSize, self.chromeSize,
+                          self.minVal, self.maxVal, self.randomSeeds[i], self.isMaxFitness, True,
+                          evaluator)
+                for i in range(self.numRuns)]
+        for newRun in runs:
+            newRun._initialGen(self.minVal, self.maxVal)
+        generations = np.array([newRun.generation for newRun in runs], dtype = np.float64)
+        fitness = np.array([newRun.fitness for newRun in runs], dtype = np.float64)
+        everyRun = np.arange(self.numRuns)
+        last = self.populationSize - 1
+
+        # Best of run, the last of equal vectors kept as in SingleRun
+        if self.isMaxFitness:
+            bestIndex = last - np.argmax(fitness[:, ::-1], axis = 1)
+        else:
+            bestIndex = last - np.argmin(fitness[:, ::-1], axis = 1)
+        bestFit = fitness[everyRun, bestIndex]
+        bestVectors = generations[everyRun, bestIndex]
+
+        for gen in range(self.numGens):
+            if self.isMaxFitness:
+                best, worst = np.argmax(fitness, axis = 1), np.argmin(fitness, axis = 1)
+            else:
+                best, worst = np.argmin(fitness, axis = 1), np.argmax(fitness, axis = 1)
+            bestVector = generations[everyRun, best][:, None, :]
+            worstVector = generations[everyRun, worst][:, None, :]
+
+            # Each run draws r1, r2 from its own generator
+            r1 = np.empty((self.numRuns, 1, self.chromeSize))
+            r2 = np.empty((self.numRuns, 1, self.chromeSize))
+            for i, newRun in enumerate(runs):
+                for j in range(self.chromeSize):
+                    r1[i, 0, j] = newRun.random.random()
+                    r2[i, 0, j] = newRun.random.random()
+
+            absGen = np.abs(generations)
+            candidates = generations + r1 * (bestVector - absGen)
+            candidates -= r2 * (worstVector - absGen)
+            np.clip(candidates, self.minVal, self.maxVal, out = candidates)
+            candidateFit = _npFitness(candidates, evaluator)
+
+            if self.isMaxFitness:
+                better = candidateFit > fitness
+            else:
+                better = candidateFit < fitness
+            generations[better] = candidates[better]
+            fitness[better] = candidateFit[better]
+
+            # Check every run for a new best of run
+            if self.isMaxFitness:
+                genBest = last - np.argmax(fitness[:, ::-1], axis = 1)
+                improved = fitness[everyRun, genBest] >= bestFit
+            else:
+                genBest = last - np.argmin(fitness[:, ::-1], axis = 1)
+                improved = fitness[everyRun, genBest] <= bestFit
+            bestFit[improved] = fitness[everyRun, genBest][improved]
+            bestVectors[improved] = generations[everyRun, genBest][improved]
+
+        for i, newRun in enumerate(runs):
+            newRun.generation = generations[i]
+            newRun.fitness = fitness[i]
+            newRun.bestOfRun['Best Fitness'] = float(bestFit[i])
+            newRun.bestOfRun['Best Vector'] = bestVectors[i].tolist()
+            newRun.currentGen = self.numGens
+            self.allRunData[i] = newRun
         self._prepareData()
 
     ###
@@ -85,28 +185,186 @@ class RunCollection:
         print('Average Fitness:', self.avgFit)
         print('Standard Deviation:', self.stdFit)
 
+###
+# Fitness function for the project
+# Returns sum of squares of all x values of a chromosome
+###
+def sumSquares(vector):
+    sumVals = 0
+    for x in vector:
+        sumVals += x * x
+    return sumVals
+
+###
+# Fitness of every vector in an array, along its last axis
+# The default sum of squares is added one column at a time, in the same
+# order as sumSquares. Any other objective goes through the evaluator.
+###
+def _npFitness(vectors, evaluator):
+    if evaluator.objective is not sumSquares:
+        fit = evaluator.evaluate(vectors.reshape(-1, vectors.shape[-1]).tolist())
+        return np.array(fit, dtype = np.float64).reshape(vectors.shape[:-1])
+    fit = vectors[..., 0] * vectors[..., 0]
+    for j in range(1, vectors.shape[-1]):
+        fit += vectors[..., j] * vectors[..., j]
+    return fit
+
+###
+# Evaluates the fitness of whole generations with a pluggable objective
+# objective takes one vector and returns its fitness, sumSquares by default.
+# backend picks how a generation is evaluated:
+#   'serial'  one vector after another in this process
+#   'thread'  a thread pool of numWorkers threads
+#   'process' a process pool of numWorkers processes. objective must be a
+#             module level function so it can be sent to them
+#   'async'   asyncio, at most concurrency at once. objective may be an async
+#             function, otherwise each call runs in a thread
+# Every backend returns the values in the order of the generation, so results
+# match serial evaluation. Pools, and the event loop for 'async', are made on
+# first use and kept until close.
+###
+class Evaluator:
+    def __init__(self, objective = None, backend = 'serial', numWorkers = None, concurrency = 8):
+        if backend not in ('serial', 'thread', 'process', 'async'):
+            raise ValueError("unknown evaluation backend '{}'".format(backend))
+        if objective is None:
+            objective = sumSquares
+        self.objective = objective
+        self.backend = backend
+        self.numWorkers = numWorkers
+        self.concurrency = concurrency
+        self.pool = None
+        self.loop = None
+
+    ###
+    # Returns a list of fitness values, one per vector, in order
+    ###
+    def evaluate(self, vectors):
+        if self.backend == 'serial' or len(vectors) < 2:
+            return [self.objective(vector) for vector in vectors]
+        if self.backend == 'async':
+            if self.loop is None:
+                self.loop = asyncio.new_event_loop()
+            return self.loop.run_until_complete(self._gather(vectors))
+        if self.pool is None:
+            if self.backend == 'thread':
+                self.pool = ThreadPoolExecutor(max_workers = self.numWorkers)
+            else:
+                self.pool = ProcessPoolExecutor(max_workers = self.numWorkers)
+        return list(self.pool.map(self.objective, vectors))
+
+    ###
+    # Submits every vector at once, limited by a semaphore
+    ###
+    async def _gather(self, vectors):
+        limit = asyncio.Semaphore(self.concurrency)
+        async def evaluateOne(vector):
+            async with limit:
+                if asyncio.iscoroutinefunction(self.objective):
+                    return await self.objective(vector)
+                return await asyncio.to_thread(self.objective, vector)
+        return await asyncio.gather(*(evaluateOne(vector) for vector in vectors))
+
+    ###
+    # Shuts down the pool and closes the event loop, if they were made
+    ###
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+        if self.loop is not None:
+            self.loop.run_until_complete(self.loop.shutdown_default_executor())
+            self.loop.close()
+            self.loop = None
+
+    ###
+    # Pools and loops cannot be pickled, so copies in other processes make their own
+    ###
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['pool'] = None
+        state['loop'] = None
+        return state
+
 ###
 # Stores data from a single GA run
 # Initializes with the number of generations to run, stores the random seed,
 # and if we want to min or max the fitness values.
-# Then runs all generations, tracking the best of the entire run.
+# Generations are run by step, iterGenerations, or run, tracking the best of
+# the entire run. Each run owns its random generator, so runs can be
+# interleaved or stopped early without affecting each other.
+# useNumpy holds the population as a 2-D array and updates it with whole
+# array operations. Random draws come from the same generator in the same
+# order, so both engines give the same results.
+# evaluator gets fitness values a generation at a time, see Evaluator. By
+# default they are summed squares, evaluated in this process.
 ###
 class SingleRun:
     def __init__(self, numGens, popSize, chromeSize, minVal, maxVal,
-                 randomSeed, isMaxFitness = True):
+                 randomSeed, isMaxFitness = True, useNumpy = False, evaluator = None):
         self.numGens = numGens
         self.populationSize = popSize
         self.chromeSize = chromeSize
+        self.minVal = minVal
+        self.maxVal = maxVal
         self.isMaxFitness = isMaxFitness
-        random.seed(randomSeed)
+        self.useNumpy = useNumpy
+        if evaluator is None:
+            evaluator = Evaluator()
+        self.evaluator = evaluator
+        if useNumpy and np is None:
+            print("WARNING: NumPy is not installed, using the list engine.")
+            self.useNumpy = False
+        self.random = random.Random(randomSeed)
         self.bestOfRun = {'Best Fitness' : None, 'Best Vector' : None}
         self.genResults = od()
-        self._initialGen(minVal, maxVal)
-        self._addBestOfRun()
-        self._generateGens(minVal, maxVal)
+        # Generations done so far, None until the initial generation exists
+        self.currentGen = None
+
+    ###
+    # Advances the run by one generation
+    # The first step creates the initial generation. Returns False, without
+    # doing anything, once all generations are done.
+    ###
+    def step(self):
+        if self.currentGen is None:
+            if self.useNumpy:
+                self._npInitialGen(self.minVal, self.maxVal)
+                self._npAddBestOfRun()
+            else:
+                self._initialGen(self.minVal, self.maxVal)
+                self._addBestOfRun()
+            self.currentGen = 0
+            return True
+        if self.currentGen >= self.numGens:
+            return False
+        if self.useNumpy:
+            self._npNewGen(self.minVal, self.maxVal)
+        else:
+            self._newGen(self.minVal, self.maxVal)
+        self.currentGen += 1
+        return True
+
+    ###
+    # Generator stepping through the rest of the run
+    # Yields the number of the generation just done, 0 for the initial one.
+    ###
+    def iterGenerations(self):
+        while self.step():
+            yield self.currentGen
+
+    ###
+    # Does every remaining generation. Returns the run itself.
+    ###
+    def run(self):
+        while self.step():
+            pass
+        return self
 
     ###
     # Creates the initial generation for the GA
+    # Fitness values are kept in a list next to the generation and only change
+    # when a vector is replaced, so no vector is evaluated twice.
     ###
     def _initialGen(self, minVal, maxVal):
         self.generation = []
@@ -114,50 +372,57 @@ class SingleRun:
         for i in range(self.populationSize):
             initial = []
             for j in range(self.chromeSize):
-                newVal = random.random()
+                newVal = self.random.random()
                 newVal *= maxVal - minVal
                 newVal += minVal
                 initial.append(newVal)
             self.generation.append(initial)
+        self.fitness = self.evaluator.evaluate(self.generation)
 
     ###
-    # Generate new generations with the Jaya Algorithm
-    ###
-    def _generateGens(self, minVal, maxVal):
-        # Repeat for all generations we want
-        for i in range(self.numGens):
-            extremes = self._genExtremes()
-            # Generate new random vectors r1, r2 from 0 to 1 for each generation
-            r1, r2 = [], []
-            for i in range(len(self.generation[0])):
-                r1.append(random.random())
-                r2.append(random.random())
-
-            # Loop through all members of the population to test for a new vector
-            for countChrome, chrome in enumerate(self.generation):
-                newVector = []
-                # Build up a new potential vector using the same random values
-                # for all chromosomes in one generation
-                for countGene, gene in enumerate(chrome):
-                    newVal = gene + r1[countGene] * (extremes[0][countGene] - abs(gene))
-                    newVal -= r2[countGene] * (extremes[1][countGene] - abs(gene))
-                    # Clamp new value if necessary
-                    if newVal < minVal:
-                        newVal = minVal
-                    if newVal > maxVal:
-                        newVal = maxVal
-                    newVector.append(newVal)
-                
-                # If the new vector's fitness is better, replace the old one.
-                if self.isMaxFitness:
-                    if self._fitness(chrome, False) < self._fitness(newVector, False):
-                        self.generation[countChrome] = newVector
-                else:
-                    if self._fitness(chrome, False) > self._fitness(newVector, False):
-                        self.generation[countChrome] = newVector
-
-            # Check for a new best of run
-            self._addBestOfRun()
+    # Generate a new generation with the Jaya Algorithm
+    ###
+    def _newGen(self, minVal, maxVal):
+        extremes = self._genExtremes()
+        # Generate new random vectors r1, r2 from 0 to 1 for each generation
+        r1, r2 = [], []
+        for i in range(len(self.generation[0])):
+            r1.append(self.random.random())
+            r2.append(self.random.random())
+
+        # Loop through all members of the population to build a new vector
+        candidates = []
+        for chrome in self.generation:
+            newVector = []
+            # Build up a new potential vector using the same random values
+            # for all chromosomes in one generation
+            for countGene, gene in enumerate(chrome):
+                newVal = gene + r1[countGene] * (extremes[0][countGene] - abs(gene))
+                newVal -= r2[countGene] * (extremes[1][countGene] - abs(gene))
+                # Clamp new value if necessary
+                if newVal < minVal:
+                    newVal = minVal
+                if newVal > maxVal:
+                    newVal = maxVal
+                newVector.append(newVal)
+            candidates.append(newVector)
+
+        # Evaluate every candidate at once, then replace each old vector
+        # the new one is better than. The old fitness is already stored.
+        newFits = self.evaluator.evaluate(candidates)
+        for countChrome, newVector in enumerate(candidates):
+            newFit = newFits[countChrome]
+            if self.isMaxFitness:
+                if self.fitness[countChrome] < newFit:
+                    self.generation[countChrome] = newVector
+                    self.fitness[countChrome] = newFit
+            else:
+                if self.fitness[countChrome] > newFit:
+                    self.generation[countChrome] = newVector
+                    self.fitness[countChrome] = newFit
+
+        # Check for a new best of run
+        self._addBestOfRun()
 
     ###
     # Get best and worst fitness vectors of a generation.
@@ -168,7 +433,7 @@ class SingleRun:
     ###
     def _genExtremes(self):
         # Get fitness values and start count at the first in the generation
-        startFit = self._fitness(0)
+        startFit = self.fitness[0]
         high = 0
         highFit = startFit
         low = 0
@@ -176,7 +441,7 @@ class SingleRun:
 
         # Check fitness values for later entries against the first
         for i in range(1, self.populationSize):
-            newFit = self._fitness(i)
+            newFit = self.fitness[i]
             if newFit > highFit:
                 highFit = newFit
                 high = i
@@ -194,28 +459,12 @@ class SingleRun:
             results.append(self.generation[high].copy())
         return results
 
-    ###
-    # Fitness function for the project
-    # Returns sum of squares of all x values of a chromosome
-    # Usually expects val to be the index of the generation.
-    # Will sometimes see it as a potential new vector (list) instead.
-    ###
-    def _fitness(self, val, isInt = True):
-        sumVals = 0
-        if isInt:
-            for x in self.generation[val]:
-                sumVals += x * x
-        else:
-            for x in val:
-                sumVals += x * x
-        return sumVals
-
     ###
     # Gets the best bitstring of the run.
     ###
     def _addBestOfRun(self):
         if self.bestOfRun['Best Fitness'] is None:
-            self.bestOfRun['Best Fitness'] = self._fitness(0)
+            self.bestOfRun['Best Fitness'] = self.fitness[0]
             self.bestOfRun['Best Vector'] = self.generation[0]
 
         # If min fitness is better, use a temporary modifier for checking
@@ -227,11 +476,75 @@ class SingleRun:
         # Check for better fitness values. Always check for greater values,
         # if min are better we multiple each by -1 first.
         for i in range(self.populationSize):
-            fit = self._fitness(i)
+            fit = self.fitness[i]
             if self.bestOfRun['Best Fitness'] * modifier <= fit * modifier:
                 self.bestOfRun['Best Fitness'] = fit
                 self.bestOfRun['Best Vector'] = self.generation[i]
 
+    ###
+    # Creates the initial generation for the array engine
+    # The values are drawn exactly as in the list engine, then stored as a
+    # (population x chromosome) array with a matching array of fitness values.
+    ###
+    def _npInitialGen(self, minVal, maxVal):
+        self._initialGen(minVal, maxVal)
+        self.generation = np.array(self.generation, dtype = np.float64)
+        self.fitness = np.array(self.fitness, dtype = np.float64)
+
+    ###
+    # Generate a new generation with the Jaya Algorithm, as array operations
+    # Every candidate is built in one broadcast expression from the best and
+    # worst vectors and the r1, r2 draws, clipped, and evaluated together.
+    # Candidates that are better replace their parents in one masked assignment.
+    ###
+    def _npNewGen(self, minVal, maxVal):
+        if self.isMaxFitness:
+            best, worst = np.argmax(self.fitness), np.argmin(self.fitness)
+        else:
+            best, worst = np.argmin(self.fitness), np.argmax(self.fitness)
+        bestVector = self.generation[best].copy()
+        worstVector = self.generation[worst].copy()
+
+        # Draw r1, r2 in the same order as the list engine
+        r1, r2 = [], []
+        for i in range(self.chromeSize):
+            r1.append(self.random.random())
+            r2.append(self.random.random())
+        r1 = np.array(r1)
+        r2 = np.array(r2)
+
+        absGen = np.abs(self.generation)
+        candidates = self.generation + r1 * (bestVector - absGen)
+        candidates -= r2 * (worstVector - absGen)
+        np.clip(candidates, minVal, maxVal, out = candidates)
+        candidateFit = _npFitness(candidates, self.evaluator)
+
+        if self.isMaxFitness:
+            better = candidateFit > self.fitness
+        else:
+            better = candidateFit < self.fitness
+        self.generation[better] = candidates[better]
+        self.fitness[better] = candidateFit[better]
+
+        # Check for a new best of run
+        self._npAddBestOfRun()
+
+    ###
+    # Gets the best vector of the run for the array engine
+    # As in _addBestOfRun, the last of several equal vectors is kept.
+    ###
+    def _npAddBestOfRun(self):
+        last = len(self.fitness) - 1
+        if self.isMaxFitness:
+            i = last - np.argmax(self.fitness[::-1])
+            isBetter = self.bestOfRun['Best Fitness'] is None or self.fitness[i] >= self.bestOfRun['Best Fitness']
+        else:
+            i = last - np.argmin(self.fitness[::-1])
+            isBetter = self.bestOfRun['Best Fitness'] is None or self.fitness[i] <= self.bestOfRun['Best Fitness']
+        if isBetter:
+            self.bestOfRun['Best Fitness'] = float(self.fitness[i])
+            self.bestOfRun['Best Vector'] = self.generation[i].tolist()
+
     ###
     # Returns the fitness value and vector of the current best of run, if any exist
     ###
@@ -245,17 +558,25 @@ class SingleRun:
         pp(self.bestOfRun)
 
 
-random.seed(15)
-seeds = []
 numRuns = 30
 numGens = 50
 popSize = 20
 chromeSize = 3
 minVal = -1.0
 maxVal = 5.0
+useNumpy = False    # Use the array engine, which needs NumPy
+batched = False     # Advance all runs together as one array, which needs NumPy
+backend = 'serial'  # How each generation's fitness values are evaluated, see Evaluator
+evalWorkers = None  # Threads or processes for those backends, None for the default
 
-for i in range(numRuns):
-    seeds.append(random.randint(0, 999))
+if __name__ == '__main__':
+    random.seed(15)
+    seeds = []
+    for i in range(numRuns):
+        seeds.append(random.randint(0, 999))
 
-fullRuns = RunCollection(numRuns, numGens, popSize, chromeSize, minVal, maxVal, seeds, False)
-fullRuns.print()
+    evaluator = Evaluator(sumSquares, backend, evalWorkers)
+    fullRuns = RunCollection(numRuns, numGens, popSize, chromeSize, minVal, maxVal, seeds, False, useNumpy,
+                             batched, evaluator)
+    evaluator.close()
+    fullRuns.print()